@@ -2,6 +2,21 @@
 
 import re
 import math
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import asyncio
+import mmap
+import struct
+import hashlib
+from array import array
+from itertools import islice
+from functools import lru_cache
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
 
 COMMON_WORDS = {
     "password", "123456", "qwerty", "admin", "user",
@@ -18,14 +33,168 @@ def score_length(pw: str) -> int:
         return int(30 * n / 8)
     return min(30, 30 + int((n - 8) * 1.5))
 
-def score_char_variety(pw: str) -> int:
+# Класи символів (як бітова маска) та регулярні вирази, що їх визначають
+LOWER_RE = re.compile(r'[a-zа-яёіїєґії]', re.I)
+UPPER_RE = re.compile(r'[A-ZА-ЯЁІЇЄҐ]')
+DIGIT_RE = re.compile(r'\d')
+SYMBOL_RE = re.compile(r'[^A-Za-zА-Яа-яЁёІЇЄҐієї0-9]')
+CLASS_LOWER, CLASS_UPPER, CLASS_DIGIT, CLASS_SYMBOL = 1, 2, 4, 8
 
-    has_lower = bool(re.search(r'[a-zа-яёіїєґії]', pw, re.I))
-    has_upper = bool(re.search(r'[A-ZА-ЯЁІЇЄҐ]', pw))
-    has_digit = bool(re.search(r'\d', pw))
-    has_symbol = bool(re.search(r'[^A-Za-zА-Яа-яЁёІЇЄҐієї0-9]', pw))
-    variety = sum([has_lower, has_upper, has_digit, has_symbol])
-    return int((variety / 4) * 40)
+class CharProfile(namedtuple("CharProfile", "lower upper digit symbol")):
+    """Кількість символів кожного класу в паролі."""
+    __slots__ = ()
+
+    @property
+    def variety(self) -> int:
+        # Кількість присутніх класів (0..4)
+        return (self.lower > 0) + (self.upper > 0) + (self.digit > 0) + (self.symbol > 0)
+
+def _class_mask(ch: str) -> int:
+    return ((CLASS_LOWER if LOWER_RE.search(ch) else 0)
+            | (CLASS_UPPER if UPPER_RE.search(ch) else 0)
+            | (CLASS_DIGIT if DIGIT_RE.search(ch) else 0)
+            | (CLASS_SYMBOL if SYMBOL_RE.search(ch) else 0))
+
+# Таблицю будуємо тими ж виразами для кодів до кінця кирилиці та для символів,
+# що збігаються з LOWER_RE лише через re.I (U+1C80..U+1C86, знак Кельвіна).
+# Усі інші символи — завжди "спецсимвол" і, можливо, цифра (\d = str.isdecimal).
+CLASS_TABLE_LIMIT = 0x530
+_CLASS_CODES = {cp: _class_mask(chr(cp))
+                for cp in [*range(CLASS_TABLE_LIMIT), *range(0x1C80, 0x1C87), 0x212A]}
+_CLASS_TABLE = {cp: chr(mask) for cp, mask in _CLASS_CODES.items()}
+
+_MASK_BITS = [tuple((mask >> bit) & 1 for bit in range(4)) for mask in range(16)]
+
+def char_class_profile(pw: str) -> CharProfile:
+    """Кількість символів кожного класу за один прохід str.translate()."""
+    lower = upper = digit = symbol = 0
+    t = pw.translate(_CLASS_TABLE)
+    for code in set(t):
+        mask = ord(code)
+        if mask > 15:
+            # Символ поза таблицею лишився як є
+            mask = _CLASS_CODES.get(mask, CLASS_SYMBOL | (CLASS_DIGIT if code.isdecimal() else 0))
+        n = t.count(code)
+        is_lower, is_upper, is_digit, is_symbol = _MASK_BITS[mask]
+        lower += is_lower * n
+        upper += is_upper * n
+        digit += is_digit * n
+        symbol += is_symbol * n
+    return CharProfile(lower, upper, digit, symbol)
+
+def char_class_profiles_np(passwords):
+    """Пакетний варіант char_class_profile: масив (n, 4) кількостей для списку паролів."""
+    import numpy as np
+
+    passwords = list(passwords)
+    if not passwords:
+        return np.zeros((0, 4), dtype=np.int64)
+    # Довжини беремо з Python: NumPy відкидає кінцеві '\x00', а код 0 і є '\x00'
+    lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=len(passwords))
+    width = int(lengths.max())
+    arr = np.array(passwords, dtype=f"<U{max(width, 1)}")
+    codes = arr.view(np.uint32).reshape(len(arr), -1)[:, :width]
+    valid = np.arange(width) < lengths[:, None]
+
+    lut = np.zeros(CLASS_TABLE_LIMIT, dtype=np.uint8)
+    for cp, mask in _CLASS_CODES.items():
+        if cp < CLASS_TABLE_LIMIT:
+            lut[cp] = mask
+    masks = lut[np.minimum(codes, CLASS_TABLE_LIMIT - 1)]
+    big = codes >= CLASS_TABLE_LIMIT
+    if big.any():
+        uniq, inverse = np.unique(codes[big], return_inverse=True)
+        extra = np.array([_CLASS_CODES.get(int(cp), CLASS_SYMBOL | (CLASS_DIGIT if chr(cp).isdecimal() else 0))
+                          for cp in uniq], dtype=np.uint8)
+        masks[big] = extra[inverse]
+    masks = np.where(valid, masks, 0)
+    return np.stack([((masks >> bit) & 1).sum(axis=1) for bit in range(4)], axis=1)
+
+def score_char_variety(pw: str, profile: CharProfile = None) -> int:
+
+    if profile is None:
+        profile = char_class_profile(pw)
+    return int((profile.variety / 4) * 40)
+
+def score_char_variety_np(passwords):
+    """Оцінки різноманітності для масиву паролів (NumPy)."""
+    variety = (char_class_profiles_np(passwords) > 0).sum(axis=1)
+    return variety * 10
+
+# Заміни символів на схожі цифри/знаки (l33t): таблиці для зворотного перетворення
+LEET_TABLES = [
+    str.maketrans({"4": "a", "@": "a", "8": "b", "(": "c", "{": "c", "3": "e", "6": "g",
+                   "1": "i", "!": "i", "|": "i", "0": "o", "$": "s", "5": "s", "7": "t",
+                   "+": "t", "2": "z"}),
+    str.maketrans({"1": "l", "|": "l", "7": "l"}),
+]
+LEET_CHARS = frozenset("4@8({36!1|0$57+2")
+
+# Транслітерація: українська -> латиниця (спрощена КМУ-2010) і назад
+UA_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e", "є": "ie",
+    "ж": "zh", "з": "z", "и": "y", "і": "i", "ї": "i", "й": "i", "к": "k", "л": "l",
+    "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ь": "",
+    "ю": "iu", "я": "ia", "'": "", "’": "",
+}
+LATIN_TO_UA = [
+    ("shch", "щ"), ("zh", "ж"), ("kh", "х"), ("ts", "ц"), ("ch", "ч"), ("sh", "ш"),
+    ("ya", "я"), ("ia", "я"), ("yu", "ю"), ("iu", "ю"), ("ye", "є"), ("ie", "є"), ("yi", "ї"),
+    ("a", "а"), ("b", "б"), ("c", "ц"), ("d", "д"), ("e", "е"), ("f", "ф"), ("g", "г"),
+    ("h", "г"), ("i", "і"), ("j", "й"), ("k", "к"), ("l", "л"), ("m", "м"), ("n", "н"),
+    ("o", "о"), ("p", "п"), ("q", "к"), ("r", "р"), ("s", "с"), ("t", "т"), ("u", "у"),
+    ("v", "в"), ("w", "в"), ("x", "кс"), ("y", "и"), ("z", "з"),
+]
+_LATIN_TO_UA_RE = re.compile("|".join(src for src, _ in LATIN_TO_UA))
+_LATIN_TO_UA_MAP = dict(LATIN_TO_UA)
+_UA_TO_LATIN_TABLE = str.maketrans(UA_TO_LATIN)
+PERSONAL_VARIANT_MIN_LEN = 3
+PERSONAL_INDEX_CACHE_SIZE = 4096
+
+def transliterate(text: str) -> str:
+    """Кирилиця -> латиниця і латиниця -> кирилиця (у нижньому регістрі)."""
+    lower = text.lower()
+    latin = lower.translate(_UA_TO_LATIN_TABLE)
+    if latin != lower:
+        return latin
+    return _LATIN_TO_UA_RE.sub(lambda m: _LATIN_TO_UA_MAP[m.group(0)], lower)
+
+def _name_variants(value: str) -> list:
+    base = value.strip().lower().replace(" ", "")
+    translit = transliterate(base)
+    return [base, base[::-1], translit, translit[::-1]]
+
+def _date_variants(date: str) -> list:
+    # Дата у форматах д.м.р, р-м-д або вісім цифр поспіль
+    groups = re.findall(r'\d+', date)
+    if len(groups) == 3:
+        if len(groups[0]) == 4:
+            y, m, d = groups
+        else:
+            d, m, y = groups
+    elif len(groups) == 1 and len(groups[0]) == 8:
+        g = groups[0]
+        if 1900 <= int(g[:4]) <= 2099:
+            y, m, d = g[:4], g[4:6], g[6:]
+        else:
+            d, m, y = g[:2], g[2:4], g[4:]
+    else:
+        return []
+    if not (d.isdigit() and m.isdigit()) or int(d) == 0 or int(m) == 0:
+        return []
+    d, m = d.zfill(2), m.zfill(2)
+    yy = y[-2:]
+    dn, mn = str(int(d)), str(int(m))
+    variants = []
+    for sep in ("", ".", "-", "/", "_"):
+        variants += [
+            sep.join((d, m, y)), sep.join((y, m, d)), sep.join((m, d, y)), sep.join((d, m, yy)),
+            sep.join((yy, m, d)), sep.join((m, d, yy)), sep.join((dn, mn, y)), sep.join((dn, mn, yy)),
+            sep.join((y, m)), sep.join((m, y)), sep.join((d, m)), sep.join((m, d)),
+        ]
+    variants += [y, yy + m + d, d + m + yy]
+    return variants
 
 def build_personal_tokens(name: str, surname: str, date: str) -> list:
 
@@ -47,31 +216,875 @@ def build_personal_tokens(name: str, surname: str, date: str) -> list:
                 tokens.append(digits[-4:])  # наприклад рік
             if len(digits) >= 6:
                 tokens.append(digits[-6:])  # дмр або ін.
+    # Варіанти: обернені та транслітеровані ім'я/прізвище, інші формати дати.
+    # Додаються лише ті, що відрізняються від уже наявних без урахування регістру.
+    variants = []
+    for value in (name, surname):
+        if value:
+            variants += [v for v in _name_variants(value) if len(v) >= PERSONAL_VARIANT_MIN_LEN]
+    if date:
+        variants += [v for v in _date_variants(date) if len(v) >= 4]
+    seen = {t.strip().lower() for t in tokens}
+    for v in variants:
+        if v not in seen:
+            seen.add(v)
+            tokens.append(v)
     # Унікалізуємо і прибираємо порожні
     return [t for t in dict.fromkeys(tokens) if t]
 
-def contains_personal_data(pw: str, personal_tokens: list) -> list:
+class AhoCorasick:
+    """Автомат Ахо-Корасік: пошук усіх шаблонів за один прохід по тексту.
 
-    found = []
-    lpw = pw.lower()
+    Будується один раз; find() повертає відсортовані індекси шаблонів
+    (у порядку, в якому їх передали), що трапляються в тексті як підрядки.
+    Для невеликих наборів (до LINEAR_LIMIT шаблонів) find() перевіряє шаблони
+    вбудованим пошуком підрядка — на коротких паролях це швидше за обхід автомата.
+    """
+
+    LINEAR_LIMIT = 64
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._linear = [(i, p) for i, p in enumerate(self.patterns) if p]
+        if len(self._linear) > self.LINEAR_LIMIT:
+            self._linear = None
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        self.out_link = [0]  # найближчий по fail-ланцюжку вузол з out
+        for idx, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.out_link.append(0)
+                node = nxt
+            self.out[node].append(idx)
+        self._build_links()
+
+    def _build_links(self):
+        goto, fail, out, out_link = self.goto, self.fail, self.out, self.out_link
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                out_link[nxt] = fail[nxt] if out[fail[nxt]] else out_link[fail[nxt]]
+                queue.append(nxt)
+
+    def step(self, node: int, ch: str) -> tuple:
+        """Один перехід автомата: (новий стан, індекси шаблонів, що закінчуються на ch)."""
+        goto, fail, out, out_link = self.goto, self.fail, self.out, self.out_link
+        while node and ch not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(ch, 0)
+        hits = []
+        hit = node if out[node] else out_link[node]
+        while hit:
+            hits.extend(out[hit])
+            hit = out_link[hit]
+        return node, hits
+
+    def find(self, text: str) -> list:
+        if self._linear is not None:
+            return [i for i, p in self._linear if p in text]
+        goto, fail, out, out_link = self.goto, self.fail, self.out, self.out_link
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if out[node] else out_link[node]
+            while hit:
+                found.update(out[hit])
+                hit = out_link[hit]
+        return sorted(found)
+
+@lru_cache(maxsize=1024)
+def _personal_matcher(personal_tokens: tuple) -> AhoCorasick:
+    # Для кожного токена два шаблони: як є і без пробілів (індекси 2i, 2i+1);
+    # другий порожній, якщо пробілів немає
+    patterns = []
     for t in personal_tokens:
         token = t.strip().lower()
-        if not token:
-            continue
-        if token in lpw or token.replace(" ", "") in lpw:
-            found.append(t)
-    return found
+        compact = token.replace(" ", "")
+        patterns.append(token)
+        patterns.append(compact if compact != token else "")
+    return AhoCorasick(patterns)
+
+def _personal_hits(pw: str, personal_tokens, matcher: AhoCorasick) -> list:
+    lpw = pw.lower()
+    if not LEET_CHARS.isdisjoint(lpw):
+        # "d3nys" -> "denys": шукаємо й у паролі з прибраними l33t-замінами;
+        # варіанти розділені '\0', тож збіг не може перетнути межу
+        lpw = "\0".join(dict.fromkeys([lpw] + [lpw.translate(table) for table in LEET_TABLES]))
+    owners = dict.fromkeys(i // 2 for i in matcher.find(lpw))
+    return [personal_tokens[i] for i in owners]
+
+def contains_personal_data(pw: str, personal_tokens: list) -> list:
+
+    return _personal_hits(pw, personal_tokens, _personal_matcher(tuple(personal_tokens)))
+
+@lru_cache(maxsize=PERSONAL_INDEX_CACHE_SIZE)
+def personal_index(name: str, surname: str, date: str) -> tuple:
+    """Токени користувача з усіма варіантами та готовий автомат для них.
+
+    Кешується за (name, surname, date) з витісненням найдавніших (LRU), тож
+    повторні перевірки для того самого користувача — один пошук у кеші.
+    """
+    tokens = tuple(build_personal_tokens(name, surname, date))
+    return tokens, _personal_matcher(tokens)
+
+_DICTIONARY_MATCHERS = {}
+
+def get_dictionary_matcher(words) -> AhoCorasick:
+    """Повертає (і кешує) автомат для набору слів; слова коротші за 3 символи ігноруються.
+
+    Ключ кешу — незмінний знімок набору (frozenset), тож змінений між викликами
+    набір дає новий автомат. frozenset використовується як ключ без копіювання.
+    """
+    if isinstance(words, AhoCorasick):
+        return words
+    key = words if isinstance(words, frozenset) else frozenset(words)
+    matcher = _DICTIONARY_MATCHERS.get(key)
+    if matcher is None:
+        matcher = AhoCorasick(w for w in words if len(w) >= 3)
+        if len(_DICTIONARY_MATCHERS) >= 16:
+            _DICTIONARY_MATCHERS.clear()
+        _DICTIONARY_MATCHERS[key] = matcher
+    return matcher
+
+def contains_dictionary_word(pw: str, words) -> list:
+
+    if isinstance(words, CompiledDictionary):
+        return words.find(pw.lower())
+    matcher = get_dictionary_matcher(words)
+    return [matcher.patterns[i] for i in matcher.find(pw.lower())]
+
+# === СКОМПІЛЬОВАНИЙ СЛОВНИК (MMAP) ===
+#
+# Формат файлу: заголовок (магія, версія, ширина вказівника, к-сть слів,
+# зміщення кореня), далі вузли байтового префіксного дерева у порядку
+# post-order. Вузол: прапорець кінця слова (u8), к-сть дітей n (u16),
+# n байтів-міток у зростаючому порядку, n вказівників на дітей.
+
+DICT_MAGIC = b"LR1DICT\0"
+DICT_VERSION = 1
+DICT_HEADER = struct.Struct("<8sIIQQ")
+DICT_NODE = struct.Struct("<BH")
+DICT_MAX_WORD_BYTES = 255
+
+def compile_wordlist(input_path: str, output_path: str) -> int:
+    """Компілює текстовий список слів (по слову на рядок) у бінарний словник.
+
+    Слова приводяться до нижнього регістру, слова коротші за 3 символи
+    відкидаються. Повертає кількість слів у словнику.
+    """
+    words = set()
+    with open(input_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            w = line.strip().lower()
+            if len(w) < 3:
+                continue
+            b = w.encode("utf-8")
+            if len(b) <= DICT_MAX_WORD_BYTES:
+                words.add(b)
+    words = sorted(words)
+    total_bytes = sum(len(w) for w in words)
+    # Верхня межа розміру файлу визначає, чи вистачить 4-байтових вказівників
+    bound = DICT_HEADER.size + (total_bytes + 1) * (DICT_NODE.size + 1 + 4)
+    ptr = struct.Struct("<I" if bound < 2 ** 32 else "<Q")
+
+    with open(output_path, "wb") as out:
+        out.write(b"\0" * DICT_HEADER.size)
+        pos = DICT_HEADER.size
+
+        def write_node(lo: int, hi: int, depth: int) -> int:
+            # words[lo:hi] мають спільний префікс довжини depth
+            nonlocal pos
+            terminal = 0
+            if lo < hi and len(words[lo]) == depth:
+                terminal = 1
+                lo += 1
+            labels = bytearray()
+            children = []
+            while lo < hi:
+                b = words[lo][depth]
+                end = lo + 1
+                while end < hi and words[end][depth] == b:
+                    end += 1
+                labels.append(b)
+                children.append(write_node(lo, end, depth + 1))
+                lo = end
+            offset = pos
+            out.write(DICT_NODE.pack(terminal, len(labels)))
+            out.write(labels)
+            for c in children:
+                out.write(ptr.pack(c))
+            pos += DICT_NODE.size + len(labels) + ptr.size * len(children)
+            return offset
+
+        root = write_node(0, len(words), 0)
+        out.seek(0)
+        out.write(DICT_HEADER.pack(DICT_MAGIC, DICT_VERSION, ptr.size, len(words), root))
+    return len(words)
+
+class CompiledDictionary:
+    """Словник, скомпільований compile_wordlist(), що читається через mmap.
+
+    Відкриття займає мілісекунди незалежно від розміру, а всі процеси, що
+    відкрили той самий файл, ділять одну копію сторінок у кеші ОС.
+    """
 
-def contains_dictionary_word(pw: str, words: set) -> list:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, width, count, root = DICT_HEADER.unpack_from(self._mm, 0)
+        if magic != DICT_MAGIC or version != DICT_VERSION:
+            self._mm.close()
+            raise ValueError(f"Файл {path} не є скомпільованим словником")
+        self._ptr = struct.Struct("<I" if width == 4 else "<Q")
+        self._count = count
+        self._root = root
 
-    found = []
+    def __len__(self) -> int:
+        return self._count
+
+    def _child(self, node: int, byte: int) -> int:
+        mm = self._mm
+        _, n = DICT_NODE.unpack_from(mm, node)
+        start = node + DICT_NODE.size
+        k = mm[start:start + n].find(byte)
+        if k < 0:
+            return -1
+        return self._ptr.unpack_from(mm, start + n + k * self._ptr.size)[0]
+
+    def __contains__(self, word: str) -> bool:
+        node = self._root
+        for byte in word.encode("utf-8"):
+            node = self._child(node, byte)
+            if node < 0:
+                return False
+        return bool(self._mm[node])
+
+    def find(self, text: str) -> list:
+        """Усі слова словника, що трапляються в тексті (відсортовані, без повторів)."""
+        data = text.encode("utf-8")
+        mm = self._mm
+        found = set()
+        for i in range(len(data)):
+            if 0x80 <= data[i] < 0xC0:
+                continue  # не початок символу UTF-8
+            node = self._root
+            for j in range(i, len(data)):
+                node = self._child(node, data[j])
+                if node < 0:
+                    break
+                if mm[node]:
+                    found.add(data[i:j + 1])
+        return [w.decode("utf-8") for w in sorted(found)]
+
+    def close(self):
+        self._mm.close()
+
+# === ПЕРЕВІРКА ЗА БАЗОЮ ВИТОКІВ (ОФЛАЙН) ===
+#
+# Файл витоків: заголовок, індекс префіксів (2**bits + 1 чисел u64 — номер
+# першого запису з даним префіксом) і відсортовані 20-байтові дайджести SHA-1.
+# Фільтр Блума — окремий необов'язковий файл: заголовок і масив бітів.
+
+BREACH_MAGIC = b"LR1SHA1\0"
+BREACH_VERSION = 1
+BREACH_HEADER = struct.Struct("<8sIIQ")
+BLOOM_MAGIC = b"LR1BLOOM"
+BLOOM_HEADER = struct.Struct("<8sIIQ")
+SHA1_SIZE = 20
+BREACH_PENALTY = 50
+
+def _iter_breach_digests(input_path: str, plain: bool):
+    with open(input_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if plain:
+                if line:
+                    yield hashlib.sha1(line.encode("utf-8")).digest()
+                continue
+            # Формат HIBP: "HEX40" або "HEX40:кількість"
+            hex_part = line.split(":", 1)[0].strip()
+            if len(hex_part) == 2 * SHA1_SIZE:
+                yield bytes.fromhex(hex_part)
+
+def build_breach_file(input_path: str, output_path: str, plain: bool = False, prefix_bits: int = 16) -> int:
+    """Будує файл витоків із хешів SHA-1 (формат HIBP) або паролів (plain=True).
+
+    Вже відсортований вхід (як у дампах HIBP) обробляється потоково;
+    невідсортований сортується в пам'яті. Повертає кількість записів.
+    """
+    if not 1 <= prefix_bits <= 24:
+        raise ValueError("prefix_bits має бути від 1 до 24")
+    buckets = 1 << prefix_bits
+    data_start = BREACH_HEADER.size + 8 * (buckets + 1)
+    digests = _iter_breach_digests(input_path, plain)
+    if plain:
+        digests = iter(sorted(set(digests)))
+
+    counts = array("Q", bytes(8 * buckets))
+    count = 0
+    unsorted = []
+    prev = b""
+    with open(output_path, "wb") as out:
+        out.seek(data_start)
+        for d in digests:
+            if d == prev:
+                continue
+            if d < prev:
+                unsorted.append(d)
+                continue
+            out.write(d)
+            counts[int.from_bytes(d[:3], "big") >> (24 - prefix_bits)] += 1
+            count += 1
+            prev = d
+        if unsorted:
+            # Вхід не був відсортований: збираємо все разом і переписуємо
+            out.flush()
+            with open(output_path, "rb") as f:
+                f.seek(data_start)
+                written = f.read()
+            all_digests = sorted(set(unsorted).union(
+                written[i:i + SHA1_SIZE] for i in range(0, len(written), SHA1_SIZE)))
+            counts = array("Q", bytes(8 * buckets))
+            out.seek(data_start)
+            out.truncate()
+            for d in all_digests:
+                out.write(d)
+                counts[int.from_bytes(d[:3], "big") >> (24 - prefix_bits)] += 1
+            count = len(all_digests)
+        index = array("Q", [0])
+        total = 0
+        for c in counts:
+            total += c
+            index.append(total)
+        out.seek(0)
+        out.write(BREACH_HEADER.pack(BREACH_MAGIC, BREACH_VERSION, prefix_bits, count))
+        out.write(index.tobytes())
+    return count
+
+def _bloom_positions(digest: bytes, m: int, k: int):
+    # Дайджест SHA-1 уже рівномірно розподілений: подвійне хешування з двох його половин
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:16], "little") | 1
+    return [(h1 + i * h2) % m for i in range(k)]
+
+def build_bloom_filter(breach_path: str, output_path: str, fp_rate: float = 0.01) -> int:
+    """Будує фільтр Блума для файлу витоків. Повертає розмір фільтра в байтах."""
+    db = BreachDatabase(breach_path)
+    n = max(1, len(db))
+    m = max(64, int(-n * math.log(fp_rate) / (math.log(2) ** 2)))
+    k = max(1, round(m / n * math.log(2)))
+    bits = bytearray((m + 7) // 8)
+    mm = db._mm
+    for off in range(db._data_start, db._data_start + len(db) * SHA1_SIZE, SHA1_SIZE):
+        for p in _bloom_positions(mm[off:off + SHA1_SIZE], m, k):
+            bits[p >> 3] |= 1 << (p & 7)
+    db.close()
+    with open(output_path, "wb") as out:
+        out.write(BLOOM_HEADER.pack(BLOOM_MAGIC, 1, k, m))
+        out.write(bits)
+    return len(bits)
+
+class BreachDatabase:
+    """Офлайн-перевірка пароля за відсортованим файлом дайджестів SHA-1 через mmap.
+
+    Індекс префіксів звужує двійковий пошук до одного кошика; необов'язковий
+    фільтр Блума відсікає більшість негативних запитів без звернення до даних.
+    """
+
+    def __init__(self, path: str, bloom_path: str = None):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, bits, count = BREACH_HEADER.unpack_from(self._mm, 0)
+        if magic != BREACH_MAGIC or version != BREACH_VERSION:
+            self._mm.close()
+            raise ValueError(f"Файл {path} не є файлом витоків")
+        self._bits = bits
+        self._count = count
+        self._index = memoryview(self._mm)[BREACH_HEADER.size:BREACH_HEADER.size + 8 * ((1 << bits) + 1)].cast("Q")
+        self._data_start = BREACH_HEADER.size + 8 * ((1 << bits) + 1)
+        self._bloom = None
+        if bloom_path:
+            with open(bloom_path, "rb") as f:
+                self._bloom = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, _, self._bloom_k, self._bloom_m = BLOOM_HEADER.unpack_from(self._bloom, 0)
+            if magic != BLOOM_MAGIC:
+                self.close()
+                raise ValueError(f"Файл {bloom_path} не є фільтром Блума")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def contains_digest(self, digest: bytes) -> bool:
+        bloom = self._bloom
+        if bloom is not None:
+            base = BLOOM_HEADER.size
+            for p in _bloom_positions(digest, self._bloom_m, self._bloom_k):
+                if not bloom[base + (p >> 3)] & (1 << (p & 7)):
+                    return False
+        bucket = int.from_bytes(digest[:3], "big") >> (24 - self._bits)
+        lo, hi = self._index[bucket], self._index[bucket + 1]
+        mm, start = self._mm, self._data_start
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            off = start + mid * SHA1_SIZE
+            rec = mm[off:off + SHA1_SIZE]
+            if rec < digest:
+                lo = mid + 1
+            elif rec > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def is_breached(self, pw: str) -> bool:
+        return self.contains_digest(hashlib.sha1(pw.encode("utf-8")).digest())
+
+    def close(self):
+        self._index.release()
+        self._mm.close()
+        if self._bloom is not None:
+            self._bloom.close()
+
+# === ОЦІНКА КІЛЬКОСТІ СПРОБ ВГАДУВАННЯ (У СТИЛІ ZXCVBN) ===
+#
+# Пароль розбивається на шаблони (словникові слова, клавіатурні доріжки,
+# послідовності, повтори, дати), і динамічним програмуванням шукається
+# розбиття з найменшою кількістю спроб. Обмеження GUESS_MAX_LENGTH і
+# GUESS_MAX_MATCHES гарантують обмежений час на один пароль.
+
+REFERENCE_YEAR = time.localtime().tm_year
+MIN_YEAR_SPACE = 20
+BRUTEFORCE_CARDINALITY = 10
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000
+GUESS_MAX_LENGTH = 64
+GUESS_MAX_MATCHES = 400
+# Відповідність log10(спроб) -> бал 0..100; пороги збігаються з оцінками zxcvbn 0-4
+# (10^3, 10^6, 10^8, 10^10) і межами estimate_strength_text
+GUESS_SCORE_POINTS = ((0, 0), (3, 30), (6, 50), (8, 70), (10, 85), (12, 100))
+
+# Поширені паролі та слова у порядку популярності (ранг = позиція у списку)
+RANKED_PASSWORDS = [
+    "123456", "password", "123456789", "12345678", "12345", "qwerty", "1234567",
+    "111111", "123123", "abc123", "1234567890", "000000", "qwerty123", "1q2w3e",
+    "iloveyou", "admin", "welcome", "monkey", "dragon", "letmein", "football",
+    "login", "master", "sunshine", "princess", "user", "secret", "hello",
+    "freedom", "whatever", "shadow", "superman", "starwars", "michael", "love",
+    "money", "student", "stud", "test", "ukraine", "kyiv", "пароль", "привіт",
+    "кохання", "україна", "київ", "сонечко", "слава",
+]
+RANKED_DICTIONARY = {w: rank for rank, w in enumerate(dict.fromkeys(RANKED_PASSWORDS + sorted(COMMON_WORDS)), 1)}
+RANKED_MAX_LEN = max(map(len, RANKED_DICTIONARY))
+
+# Розкладки: рядки клавіш (без Shift, з Shift)
+KEYBOARD_LAYOUTS = {
+    "qwerty": (
+        ("`1234567890-=", "~!@#$%^&*()_+"),
+        ("qwertyuiop[]\\", "QWERTYUIOP{}|"),
+        ("asdfghjkl;'", "ASDFGHJKL:\""),
+        ("zxcvbnm,./", "ZXCVBNM<>?"),
+    ),
+    "йцукен": (
+        ("'1234567890-=", "₴!\"№;%:?*()_+"),
+        ("йцукенгшщзхї\\", "ЙЦУКЕНГШЩЗХЇ/"),
+        ("фівапролджє", "ФІВАПРОЛДЖЄ"),
+        ("ячсмитьбю.", "ЯЧСМИТЬБЮ,"),
+    ),
+}
+
+def _build_keyboard_graph(rows):
+    # Похилі ряди: сусіди клавіші (x, y) у фіксованому порядку напрямків
+    keys = {}
+    chars = {}
+    for y, (plain, shifted) in enumerate(rows):
+        for x, (a, b) in enumerate(zip(plain, shifted)):
+            keys[(x, y)] = a
+            chars[a] = (a, False)
+            chars[b] = (a, True)
+    adjacency = {}
+    for (x, y), key in keys.items():
+        coords = ((x - 1, y), (x, y - 1), (x + 1, y - 1), (x + 1, y), (x, y + 1), (x - 1, y + 1))
+        adjacency[key] = [keys.get(c) for c in coords]
+    degree = sum(sum(1 for n in nbrs if n) for nbrs in adjacency.values()) / len(adjacency)
+    return {"chars": chars, "adjacency": adjacency, "starts": len(adjacency), "degree": degree}
+
+KEYBOARD_GRAPHS = {name: _build_keyboard_graph(rows) for name, rows in KEYBOARD_LAYOUTS.items()}
+
+SEQUENCE_ALPHABETS = [
+    "abcdefghijklmnopqrstuvwxyz", "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "0123456789",
+    "абвгґдеєжзиіїйклмнопрстуфхцчшщьюя", "АБВГҐДЕЄЖЗИІЇЙКЛМНОПРСТУФХЦЧШЩЬЮЯ",
+]
+_SEQUENCE_POS = {ch: (aid, idx) for aid, alphabet in enumerate(SEQUENCE_ALPHABETS) for idx, ch in enumerate(alphabet)}
+
+DATE_SPLITS = {
+    4: ((1, 2), (2, 3)),
+    5: ((1, 3), (2, 3)),
+    6: ((1, 2), (2, 4), (4, 5)),
+    7: ((1, 3), (2, 3), (4, 5), (4, 6)),
+    8: ((2, 4), (4, 6)),
+}
+_DATE_WITH_SEP_RE = re.compile(r'(?=(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4}))')
+_YEAR_RE = re.compile(r'19\d\d|20\d\d')
+_DIGITS_RE = re.compile(r'\d{4,8}')
+_REPEAT_GREEDY_RE = re.compile(r'(.+)\1+', re.S)
+_REPEAT_LAZY_RE = re.compile(r'(.+?)\1+', re.S)
+_REPEAT_LAZY_ANCHORED_RE = re.compile(r'^(.+?)\1+$', re.S)
+
+_FACTORIALS = [float(math.factorial(n)) for n in range(GUESS_MAX_LENGTH + 1)]
+
+def _match(pattern: str, i: int, j: int, token: str, guesses: float, **extra) -> dict:
+    m = {"pattern": pattern, "i": i, "j": j, "token": token, "guesses": guesses}
+    m.update(extra)
+    return m
+
+def _uppercase_variations(word: str) -> float:
+    upper = sum(1 for c in word if c.isupper())
+    lower = sum(1 for c in word if c.islower())
+    if upper == 0:
+        return 1
+    # Велика лише перша/остання літера або всі великі — найпоширеніші варіанти
+    if lower == 0 or (upper == 1 and (word[0].isupper() or word[-1].isupper())):
+        return 2
+    return sum(math.comb(upper + lower, k) for k in range(1, min(upper, lower) + 1))
+
+def _leet_variations(token: str, sub: dict) -> float:
+    variations = 1
+    lower = token.lower()
+    for leet, letter in sub.items():
+        subbed = lower.count(leet)
+        unsubbed = lower.count(letter)
+        if subbed == 0 or unsubbed == 0:
+            variations *= 2
+        else:
+            variations *= sum(math.comb(subbed + unsubbed, k) for k in range(1, min(subbed, unsubbed) + 1))
+    return variations
+
+def _dictionary_matches(pw: str, dictionaries: list) -> list:
+    matches = []
     lpw = pw.lower()
-    for w in words:
-        if len(w) < 3:
+    n = len(pw)
+    reversed_lpw = lpw[::-1]
+    leet_variants = []
+    if LEET_CHARS.intersection(lpw):
+        for table in LEET_TABLES:
+            variant = lpw.translate(table)
+            if variant != lpw:
+                leet_variants.append(variant)
+    for name, ranked, max_word_len in dictionaries:
+        max_len = min(n, max_word_len)
+        for i in range(n):
+            for j in range(i, min(n, i + max_len)):
+                word = lpw[i:j + 1]
+                rank = ranked.get(word)
+                if rank is not None:
+                    token = pw[i:j + 1]
+                    matches.append(_match("dictionary", i, j, token, rank * _uppercase_variations(token),
+                                          dictionary=name, rank=rank))
+                word = reversed_lpw[i:j + 1]
+                rank = ranked.get(word)
+                if rank is not None and len(word) > 1 and word != word[::-1]:
+                    a, b = n - 1 - j, n - 1 - i
+                    token = pw[a:b + 1]
+                    matches.append(_match("dictionary", a, b, token, 2 * rank * _uppercase_variations(token),
+                                          dictionary=name, rank=rank, reversed=True))
+                for variant in leet_variants:
+                    word = variant[i:j + 1]
+                    if word == lpw[i:j + 1] or len(word) < 2:
+                        continue
+                    rank = ranked.get(word)
+                    if rank is not None:
+                        token = pw[i:j + 1]
+                        sub = {c: w for c, w in zip(token.lower(), word) if c != w}
+                        guesses = rank * _uppercase_variations(token) * _leet_variations(token, sub)
+                        matches.append(_match("dictionary", i, j, token, guesses,
+                                              dictionary=name, rank=rank, l33t=True))
+    return matches
+
+@lru_cache(maxsize=None)
+def _spatial_guesses(layout: str, length: int, turns: int, shifted: int) -> float:
+    graph = KEYBOARD_GRAPHS[layout]
+    starts, degree = graph["starts"], graph["degree"]
+    guesses = 0.0
+    for i in range(2, length + 1):
+        for j in range(1, min(turns, i - 1) + 1):
+            guesses += math.comb(i - 1, j - 1) * starts * degree ** j
+    if shifted:
+        unshifted = length - shifted
+        if unshifted == 0:
+            guesses *= 2
+        else:
+            guesses *= sum(math.comb(length, k) for k in range(1, min(shifted, unshifted) + 1))
+    return guesses
+
+def _spatial_matches(pw: str) -> list:
+    matches = []
+    n = len(pw)
+    for layout, graph in KEYBOARD_GRAPHS.items():
+        chars, adjacency = graph["chars"], graph["adjacency"]
+        i = 0
+        while i < n - 1:
+            j = i + 1
+            last_direction = None
+            turns = 0
+            start = chars.get(pw[i])
+            shifted = 1 if start and start[1] else 0
+            while start and j < n:
+                cur = chars.get(pw[j])
+                prev_key = chars[pw[j - 1]][0]
+                if cur is None or cur[0] not in adjacency[prev_key]:
+                    break
+                direction = adjacency[prev_key].index(cur[0])
+                if direction != last_direction:
+                    turns += 1
+                    last_direction = direction
+                if cur[1]:
+                    shifted += 1
+                j += 1
+            if j - i > 2:
+                matches.append(_match("spatial", i, j - 1, pw[i:j],
+                                      _spatial_guesses(layout, j - i, turns, shifted),
+                                      graph=layout, turns=turns, shifted_count=shifted))
+            i = j
+    return matches
+
+def _sequence_matches(pw: str) -> list:
+    matches = []
+    n = len(pw)
+
+    def emit(i, j, delta):
+        if j - i < 2 or abs(delta) > 5:
+            return
+        token = pw[i:j + 1]
+        first = token[0]
+        if first in "aAzZ019аАяЯ":
+            base = 4
+        elif first.isdigit():
+            base = 10
+        else:
+            base = len(SEQUENCE_ALPHABETS[_SEQUENCE_POS[first][0]])
+        if delta < 0:
+            base *= 2
+        matches.append(_match("sequence", i, j, token, base * len(token), ascending=delta > 0))
+
+    i = 0
+    while i < n - 1:
+        a, b = _SEQUENCE_POS.get(pw[i]), _SEQUENCE_POS.get(pw[i + 1])
+        if not a or not b or a[0] != b[0] or a[1] == b[1]:
+            i += 1
+            continue
+        delta = b[1] - a[1]
+        j = i + 1
+        while j + 1 < n:
+            c = _SEQUENCE_POS.get(pw[j + 1])
+            prev = _SEQUENCE_POS[pw[j]]
+            if not c or c[0] != prev[0] or c[1] - prev[1] != delta:
+                break
+            j += 1
+        emit(i, j, delta)
+        i = j
+    return matches
+
+def _repeat_matches(pw: str, dictionaries: list, depth: int) -> list:
+    matches = []
+    last = 0
+    while last < len(pw):
+        greedy = _REPEAT_GREEDY_RE.search(pw, last)
+        if not greedy:
+            break
+        lazy = _REPEAT_LAZY_RE.search(pw, last)
+        if len(greedy.group(0)) > len(lazy.group(0)):
+            found = greedy
+            base = _REPEAT_LAZY_ANCHORED_RE.match(found.group(0)).group(1)
+        else:
+            found = lazy
+            base = found.group(1)
+        token = found.group(0)
+        base_guesses = _most_guessable(base, dictionaries, depth + 1)["guesses"]
+        matches.append(_match("repeat", found.start(), found.end() - 1, token,
+                              base_guesses * (len(token) // len(base)), base_token=base))
+        last = found.end()
+    return matches
+
+def _date_year(parts) -> int:
+    # Рік має бути першим або останнім, решта — день і місяць у будь-якому порядку
+    for year, r1, r2 in ((parts[2], parts[0], parts[1]), (parts[0], parts[1], parts[2])):
+        if 100 <= year < 1000 or year > 2050:
             continue
-        if w in lpw:
-            found.append(w)
-    return found
+        for day, month in ((r1, r2), (r2, r1)):
+            if 1 <= day <= 31 and 1 <= month <= 12:
+                if year < 100:
+                    year += 1900 if year > 50 else 2000
+                return year
+    return 0
+
+def _date_guesses(year: int, separator: bool) -> float:
+    return max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE) * 365 * (4 if separator else 1)
+
+def _date_matches(pw: str) -> list:
+    matches = []
+    n = len(pw)
+    for m in _YEAR_RE.finditer(pw):
+        year = int(m.group(0))
+        matches.append(_match("year", m.start(), m.end() - 1, m.group(0),
+                              max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE)))
+    for i in range(n):
+        for j in range(i + 3, min(n, i + 8)):
+            token = pw[i:j + 1]
+            if not token.isdigit() or not token.isascii():
+                break
+            years = [_date_year((int(token[:a]), int(token[a:b]), int(token[b:])))
+                     for a, b in DATE_SPLITS[len(token)]]
+            years = [y for y in years if y]
+            if years:
+                year = min(years, key=lambda y: abs(y - REFERENCE_YEAR))
+                matches.append(_match("date", i, j, token, _date_guesses(year, False), year=year))
+    for m in _DATE_WITH_SEP_RE.finditer(pw):
+        first, sep, second, third = m.groups()
+        year = _date_year((int(first), int(second), int(third)))
+        if year:
+            length = len(first) + len(second) + len(third) + 2
+            i = m.start()
+            matches.append(_match("date", i, i + length - 1, pw[i:i + length],
+                                  _date_guesses(year, True), year=year, separator=sep))
+    return matches
+
+def _bruteforce_guesses(length: int) -> float:
+    floor = MIN_SUBMATCH_GUESSES_SINGLE_CHAR if length == 1 else MIN_SUBMATCH_GUESSES_MULTI_CHAR
+    return max(float(BRUTEFORCE_CARDINALITY) ** length, floor + 1)
+
+def _omnimatch(pw: str, dictionaries: list, depth: int) -> list:
+    matches = _dictionary_matches(pw, dictionaries)
+    matches += _spatial_matches(pw)
+    matches += _sequence_matches(pw)
+    matches += _date_matches(pw)
+    if depth == 0:
+        matches += _repeat_matches(pw, dictionaries, depth)
+    n = len(pw)
+    for m in matches:
+        # Підрядок не може бути простішим за мінімальний поріг
+        if m["j"] - m["i"] + 1 < n:
+            floor = MIN_SUBMATCH_GUESSES_SINGLE_CHAR if m["i"] == m["j"] else MIN_SUBMATCH_GUESSES_MULTI_CHAR
+            m["guesses"] = max(m["guesses"], floor)
+        m["guesses"] = max(float(m["guesses"]), 1.0)
+    if len(matches) > GUESS_MAX_MATCHES:
+        # Залишаємо найвигідніші шаблони: найменше спроб на символ
+        matches.sort(key=lambda m: math.log10(m["guesses"]) / (m["j"] - m["i"] + 1))
+        del matches[GUESS_MAX_MATCHES:]
+    return matches
+
+def _most_guessable(pw: str, dictionaries: list, depth: int = 0) -> dict:
+    n = len(pw)
+    if n == 0:
+        return {"guesses": 1.0, "sequence": []}
+    by_end = [[] for _ in range(n)]
+    for m in _omnimatch(pw, dictionaries, depth):
+        by_end[m["j"]].append(m)
+
+    # optimal_*[k][l]: найкраще покриття pw[:k+1] з l шаблонів
+    best_m = [{} for _ in range(n)]
+    best_pi = [{} for _ in range(n)]
+    best_g = [{} for _ in range(n)]
+
+    def update(m, l, pi):
+        k = m["j"]
+        g = _FACTORIALS[l] * pi + MIN_GUESSES_BEFORE_GROWING_SEQUENCE ** (l - 1)
+        for competing_l, competing_g in best_g[k].items():
+            if competing_l <= l and competing_g <= g:
+                return
+        best_g[k][l] = g
+        best_m[k][l] = m
+        best_pi[k][l] = pi
+
+    for k in range(n):
+        for m in by_end[k]:
+            if m["i"] > 0:
+                for l, pi in list(best_pi[m["i"] - 1].items()):
+                    update(m, l + 1, pi * m["guesses"])
+            else:
+                update(m, 1, m["guesses"])
+        bf = _match("bruteforce", 0, k, pw[:k + 1], _bruteforce_guesses(k + 1))
+        update(bf, 1, bf["guesses"])
+        for i in range(1, k + 1):
+            bf = None
+            for l, last_m in list(best_m[i - 1].items()):
+                if last_m["pattern"] == "bruteforce":
+                    continue
+                if bf is None:
+                    bf = _match("bruteforce", i, k, pw[i:k + 1], _bruteforce_guesses(k - i + 1))
+                update(bf, l + 1, best_pi[i - 1][l] * bf["guesses"])
+
+    k = n - 1
+    l, guesses = min(best_g[k].items(), key=lambda item: item[1])
+    sequence = []
+    while k >= 0:
+        m = best_m[k][l]
+        sequence.append(m)
+        k = m["i"] - 1
+        l -= 1
+    sequence.reverse()
+    return {"guesses": guesses, "sequence": sequence}
+
+def estimate_guesses(pw: str, personal_tokens: list = (), extra_words: dict = None) -> dict:
+    """Оцінка кількості спроб вгадування пароля.
+
+    personal_tokens — дані користувача (найнижчий ранг у словнику);
+    extra_words — додатковий словник {слово: ранг}. Паролі довші за
+    GUESS_MAX_LENGTH оцінюються за префіксом, решта символів — як перебір.
+    Повертає guesses, guesses_log10 і послідовність шаблонів (без самих фрагментів пароля).
+    """
+    user_ranked = {}
+    for t in personal_tokens:
+        token = t.strip().lower()
+        if token:
+            user_ranked.setdefault(token, len(user_ranked) + 1)
+    # (назва, {слово: ранг}, найбільша довжина слова)
+    dictionaries = [("passwords", RANKED_DICTIONARY, RANKED_MAX_LEN),
+                    ("user_inputs", user_ranked, max(map(len, user_ranked), default=0))]
+    if extra_words:
+        dictionaries.append(("extra", extra_words, max(map(len, extra_words))))
+
+    head = pw[:GUESS_MAX_LENGTH]
+    result = _most_guessable(head, dictionaries)
+    log10 = math.log10(result["guesses"]) + (len(pw) - len(head)) * math.log10(BRUTEFORCE_CARDINALITY)
+    return {
+        "guesses": 10 ** min(log10, 300),
+        "guesses_log10": log10,
+        "sequence": [{"pattern": m["pattern"], "i": m["i"], "j": m["j"],
+                      "guesses_log10": math.log10(m["guesses"])} for m in result["sequence"]],
+    }
+
+def guesses_to_score(guesses_log10: float) -> int:
+    points = GUESS_SCORE_POINTS
+    if guesses_log10 >= points[-1][0]:
+        return points[-1][1]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        if guesses_log10 < x1:
+            return max(0, int(y0 + (guesses_log10 - x0) * (y1 - y0) / (x1 - x0)))
 
 def estimate_strength_text(score: int) -> str:
 
@@ -110,19 +1123,49 @@ def security_level_from_five(five: int) -> str:
         5: "Відмінний"
     }.get(five, "Н/Д")
 
-def analyze_password(pw: str, name: str, surname: str, date: str) -> dict:
-    len_sc = score_length(pw)
-    var_sc = score_char_variety(pw)
-    personal_tokens = build_personal_tokens(name, surname, date)
-    personal_found = contains_personal_data(pw, personal_tokens)
-    dict_found = contains_dictionary_word(pw, COMMON_WORDS)
+def analyze_password(pw: str, name: str, surname: str, date: str, words=None, breach_db=None,
+                     mode: str = "classic") -> dict:
+    """Аналіз пароля.
+
+    mode="classic" — довжина + різноманітність мінус штрафи;
+    mode="guesses" — оцінка за кількістю спроб вгадування (estimate_guesses).
+    """
+    if mode not in ("classic", "guesses"):
+        raise ValueError(f"Невідомий режим оцінки: {mode}")
+    profile = char_class_profile(pw)
+    personal_tokens, personal_matcher = personal_index(name, surname, date)
+    personal_found = _personal_hits(pw, personal_tokens, personal_matcher)
+    dict_found = contains_dictionary_word(pw, COMMON_WORDS if words is None else words)
+
+    breached = breach_db is not None and breach_db.is_breached(pw)
+
+    estimate = None
+    if mode == "guesses":
+        # Персональні дані та словникові слова вже враховані як шаблони
+        extra = {w: max(1, len(words)) for w in dict_found} if words is not None else None
+        estimate = estimate_guesses(pw, personal_tokens, extra)
+    return _build_report(len(pw), profile, personal_found, dict_found, breached, estimate,
+                         name, surname, date)
+
+def _build_report(length: int, profile: CharProfile, personal_found: list, dict_found: list,
+                  breached: bool, estimate: dict, name: str, surname: str, date: str) -> dict:
+    # Спільна частина analyze_password та IncrementalScorer: бали, рекомендації, звіт.
+    # Сам пароль тут не потрібен — лише його довжина і знайдені ознаки.
+    mask = '*' * length
+    len_sc = score_length(mask)
+    var_sc = score_char_variety(mask, profile)
 
     penalty = 0
-    if personal_found:
-        penalty += 30
-    penalty += 10 * len(dict_found)
+    if estimate is not None:
+        raw_score = guesses_to_score(estimate["guesses_log10"])
+    else:
+        if personal_found:
+            penalty += 30
+        penalty += 10 * len(dict_found)
+        raw_score = len_sc + var_sc  # максимум 70
+    if breached:
+        penalty += BREACH_PENALTY
 
-    raw_score = len_sc + var_sc  # максимум 70
     final_score = max(0, min(100, raw_score - penalty))
     rating_text = estimate_strength_text(final_score)
     five_score = map_to_five(final_score)
@@ -130,25 +1173,27 @@ def analyze_password(pw: str, name: str, surname: str, date: str) -> dict:
 
     # Рекомендації
     recs = []
-    if len(pw) < 12:
+    if length < 12:
         recs.append("Збільшити довжину пароля до ≥12 символів.")
-    if not re.search(r'[A-ZА-ЯЁІЇЄҐ]', pw):
+    if not profile.upper:
         recs.append("Додати великі літери.")
-    if not re.search(r'[a-zа-яёіїєґії]', pw, re.I):
+    if not profile.lower:
         recs.append("Додати малі літери.")
-    if not re.search(r'\d', pw):
+    if not profile.digit:
         recs.append("Додати цифри.")
-    if not re.search(r'[^A-Za-zА-Яа-яЁёІЇЄҐієї0-9]', pw):
+    if not profile.symbol:
         recs.append("Додати спеціальні символи (наприклад: !@#$%).")
     if personal_found:
         recs.append(f"Уникати використання персональних даних у паролі: {', '.join(personal_found)}.")
     if dict_found:
         recs.append(f"Уникати словникових слів або їх частин: {', '.join(dict_found)}.")
+    if breached:
+        recs.append("Пароль знайдено у базі витоків — замініть його на новий унікальний пароль.")
     if not recs:
         recs.append("Пароль виглядає добре; розгляньте менеджер паролів для унікальності пароля на різних сайтах.")
 
-    return {
-        "password_mask": '*' * len(pw),
+    report = {
+        "password_mask": mask,
         "length_score": len_sc,
         "variety_score": var_sc,
         "raw_score": raw_score,
@@ -159,6 +1204,7 @@ def analyze_password(pw: str, name: str, surname: str, date: str) -> dict:
         "security_level": sec_level,
         "personal_found": personal_found,
         "dict_found": dict_found,
+        "breached": breached,
         "recommendations": recs,
         "inputs": {
             "name": name,
@@ -166,6 +1212,11 @@ def analyze_password(pw: str, name: str, surname: str, date: str) -> dict:
             "date": date
         }
     }
+    if estimate is not None:
+        report["guesses"] = estimate["guesses"]
+        report["guesses_log10"] = estimate["guesses_log10"]
+        report["patterns"] = estimate["sequence"]
+    return report
 
 def pretty_print(report: dict):
     print("\n=== Результат аналізу пароля ===")
@@ -176,7 +1227,10 @@ def pretty_print(report: dict):
     print(f"Пароль: {report['password_mask']}  (пароль не виводиться повністю)")
     print(f"Оцінка довжини: {report['length_score']}/30")
     print(f"Оцінка різноманітності: {report['variety_score']}/40")
-    print(f"Сирий бал (довжина+різноманітність): {report['raw_score']}/70")
+    if 'guesses_log10' in report:
+        print(f"Оцінка кількості спроб: 10^{report['guesses_log10']:.1f} -> {report['raw_score']}/100")
+    else:
+        print(f"Сирий бал (довжина+різноманітність): {report['raw_score']}/70")
     print(f"Штрафи: {report['penalty']}")
     print(f"Підсумкова оцінка: {report['final_score']}/100 -> {report['rating_text']}")
     print(f"Загальна оцінка (0-5): {report['five_score']} -> {report['security_level']}")
@@ -184,6 +1238,8 @@ def pretty_print(report: dict):
         print("Знайдено персональні дані у паролі:", ", ".join(report['personal_found']))
     if report['dict_found']:
         print("Знайдені словникові фрагменти:", ", ".join(report['dict_found']))
+    if report['breached']:
+        print("Пароль знайдено у базі витоків!")
     print("\nРекомендації:")
     for r in report['recommendations']:
         print(" -", r)
@@ -209,5 +1265,663 @@ def main():
     report = analyze_password(pw, name, surname, date)
     pretty_print(report)
 
+# === ПОКРОКОВА ОЦІНКА (ПІД ЧАС НАБОРУ) ===
+
+class IncrementalScorer:
+    """Оцінка пароля, що оновлюється з кожним натисканням клавіші.
+
+    Для кожної позиції зберігається стан автоматів (словник і персональні дані,
+    включно з l33t-варіантами), накопичені лічильники класів символів і знайдені
+    на цій позиції збіги. Додавання символу — один крок автоматів, видалення —
+    зняття стану зі стеку, тож вартість натискання не залежить від довжини пароля.
+    report() повертає ті самі поля, що й analyze_password.
+    """
+
+    def __init__(self, name: str, surname: str, date: str, words=None, breach_db=None,
+                 mode: str = "classic"):
+        if mode not in ("classic", "guesses"):
+            raise ValueError(f"Невідомий режим оцінки: {mode}")
+        self.name, self.surname, self.date = name, surname, date
+        self.words = words
+        self.breach_db = breach_db
+        self.mode = mode
+        self._personal_tokens, self._personal = personal_index(name, surname, date)
+        words = COMMON_WORDS if words is None else words
+        self._trie = words if isinstance(words, CompiledDictionary) else None
+        self._dictionary = None if self._trie is not None else get_dictionary_matcher(words)
+
+        self._chars = []
+        self._lowered = bytearray()  # UTF-8 пароля в нижньому регістрі (для скомпільованого словника)
+        # Стеки станів: елемент i — стан після i-го символу; нульовий — порожній пароль
+        self._personal_states = [(0,) * (1 + len(LEET_TABLES))]
+        self._dict_states = [()] if self._trie is not None else [0]
+        self._counts = [(0, 0, 0, 0)]
+        self._hits = [((), ())]
+        self._personal_found = {}
+        self._dict_found = {}
+
+    @property
+    def password(self) -> str:
+        return "".join(self._chars)
+
+    def __len__(self) -> int:
+        return len(self._chars)
+
+    def append(self, text: str):
+        for ch in text:
+            self._push(ch)
+
+    def delete(self, count: int = 1):
+        """Видаляє count останніх символів (Backspace)."""
+        for _ in range(min(count, len(self._chars))):
+            self._pop()
+
+    def set_text(self, text: str):
+        """Довільна правка: відкат до спільного префікса і дописування решти."""
+        common = 0
+        for a, b in zip(self._chars, text):
+            if a != b:
+                break
+            common += 1
+        self.delete(len(self._chars) - common)
+        self.append(text[common:])
+
+    def _push(self, ch: str):
+        lower = ch.lower()
+
+        # Персональні дані: звичайний пароль і кожен l33t-варіант — окремий стан автомата
+        personal_hits = set()
+        states = []
+        for k, node in enumerate(self._personal_states[-1]):
+            text = lower if k == 0 else lower.translate(LEET_TABLES[k - 1])
+            for c in text:
+                node, hits = self._personal.step(node, c)
+                personal_hits.update(h // 2 for h in hits)
+            states.append(node)
+        self._personal_states.append(tuple(states))
+
+        dict_hits = []
+        if self._trie is not None:
+            # Активні вузли префіксного дерева: (вузол, початок слова у байтах)
+            trie = self._trie
+            data = lower.encode("utf-8")
+            active = list(self._dict_states[-1])
+            for byte in data:
+                pos = len(self._lowered)
+                self._lowered.append(byte)
+                if not 0x80 <= byte < 0xC0:
+                    active.append((trie._root, pos))
+                next_active = []
+                for node, start in active:
+                    child = trie._child(node, byte)
+                    if child < 0:
+                        continue
+                    if trie._mm[child]:
+                        dict_hits.append(bytes(self._lowered[start:pos + 1]).decode("utf-8"))
+                    next_active.append((child, start))
+                active = next_active
+            self._dict_states.append(tuple(active))
+        else:
+            node = self._dict_states[-1]
+            for c in lower:
+                node, hits = self._dictionary.step(node, c)
+                dict_hits.extend(hits)
+            self._dict_states.append(node)
+
+        mask = _CLASS_CODES.get(ord(ch))
+        if mask is None:
+            mask = CLASS_SYMBOL | (CLASS_DIGIT if ch.isdecimal() else 0)
+        bits = _MASK_BITS[mask]
+        self._counts.append(tuple(c + b for c, b in zip(self._counts[-1], bits)))
+
+        hits = (tuple(personal_hits), tuple(dict_hits))
+        self._hits.append(hits)
+        for key in hits[0]:
+            self._personal_found[key] = self._personal_found.get(key, 0) + 1
+        for key in hits[1]:
+            self._dict_found[key] = self._dict_found.get(key, 0) + 1
+        self._chars.append(ch)
+
+    def _pop(self):
+        ch = self._chars.pop()
+        if self._trie is not None:
+            del self._lowered[len(self._lowered) - len(ch.lower().encode("utf-8")):]
+        self._personal_states.pop()
+        self._dict_states.pop()
+        self._counts.pop()
+        personal_hits, dict_hits = self._hits.pop()
+        for found, keys in ((self._personal_found, personal_hits), (self._dict_found, dict_hits)):
+            for key in keys:
+                found[key] -= 1
+                if not found[key]:
+                    del found[key]
+
+    def report(self) -> dict:
+        personal_found = [self._personal_tokens[i] for i in sorted(self._personal_found)]
+        if self._trie is not None:
+            dict_found = sorted(self._dict_found)
+        else:
+            dict_found = [self._dictionary.patterns[i] for i in sorted(self._dict_found)]
+        pw = None
+        breached = False
+        if self.breach_db is not None:
+            pw = self.password
+            breached = self.breach_db.is_breached(pw)
+        estimate = None
+        if self.mode == "guesses":
+            # Оцінка спроб не інкрементна, але має обмежений час (GUESS_MAX_LENGTH)
+            pw = pw if pw is not None else self.password
+            extra = {w: max(1, len(self.words)) for w in dict_found} if self.words is not None else None
+            estimate = estimate_guesses(pw, self._personal_tokens, extra)
+        return _build_report(len(self._chars), CharProfile(*self._counts[-1]), personal_found,
+                             dict_found, breached, estimate, self.name, self.surname, self.date)
+
+def benchmark_incremental(lengths=(8, 64, 256, 1024), keystrokes: int = 2000) -> list:
+    """Середній час одного натискання (додати символ + report()) за різної довжини пароля."""
+    results = []
+    for length in lengths:
+        scorer = IncrementalScorer("Denys", "Піддубний", "23.07.1995")
+        scorer.append(("Qwerty!1995_пароль" * (length // 18 + 1))[:length])
+        start = time.perf_counter()
+        for i in range(keystrokes):
+            if i % 2:
+                scorer.delete()
+            else:
+                scorer.append("x")
+            scorer.report()
+        per_key = (time.perf_counter() - start) / keystrokes
+        start = time.perf_counter()
+        for i in range(max(1, keystrokes // 10)):
+            analyze_password(scorer.password + "x", "Denys", "Піддубний", "23.07.1995")
+        full = (time.perf_counter() - start) / max(1, keystrokes // 10)
+        results.append({"length": length, "keystroke_us": per_key * 1e6, "full_analysis_us": full * 1e6})
+    return results
+
+# === ПАКЕТНИЙ АУДИТ ===
+
+RECORD_FIELDS = ("password", "name", "surname", "date")
+
+# Некоректний рядок вхідного файлу: у звіт потрапляє рядок помилки, аудит триває
+InvalidRecord = namedtuple("InvalidRecord", "line error")
+
+# Байти, що не декодуються як UTF-8, при surrogateescape стають символами U+DC80..U+DCFF
+UNDECODABLE_RE = re.compile("[\udc80-\udcff]")
+UNDECODABLE_ERROR = "Рядок містить байти, що не є коректним UTF-8"
+
+def iter_records(path: str):
+    """Потоково читає записи (password, name, surname, date) з CSV або JSONL.
+
+    Замість рядка, який не вдалося розібрати або декодувати як UTF-8,
+    повертається InvalidRecord.
+    """
+    with open(path, "r", encoding="utf-8", errors="surrogateescape", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson", ".json")):
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                if UNDECODABLE_RE.search(line):
+                    yield InvalidRecord(line_no, UNDECODABLE_ERROR)
+                    continue
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    yield InvalidRecord(line_no, "Некоректний JSON")
+                    continue
+                if not isinstance(obj, dict):
+                    yield InvalidRecord(line_no, "Очікується JSON-об'єкт з полями password, name, surname, date")
+                    continue
+                yield tuple(str(obj.get(k) or "") for k in RECORD_FIELDS)
+        else:
+            reader = csv.reader(f)
+            first = next(reader, None)
+            if first is None:
+                return
+            header = [h.strip().lower() for h in first]
+            if "password" in header:
+                idx = [header.index(k) if k in header else None for k in RECORD_FIELDS]
+            else:
+                # Файл без заголовка: колонки у порядку RECORD_FIELDS
+                idx = list(range(len(RECORD_FIELDS)))
+                reader = _prepend(first, reader)
+            for row in reader:
+                if not row:
+                    continue
+                if any(UNDECODABLE_RE.search(field) for field in row):
+                    yield InvalidRecord(reader.line_num, UNDECODABLE_ERROR)
+                    continue
+                yield tuple(row[i] if i is not None and i < len(row) else "" for i in idx)
+
+def _prepend(first, rows):
+    yield first
+    yield from rows
+
+_WORKER_WORDS = None
+_WORKER_BREACH = None
+
+def _init_audit_worker(words_path: str, breach_path: str = None, bloom_path: str = None):
+    # Кожен воркер відкриває файли сам: mmap не серіалізується,
+    # а сторінки файлів все одно спільні через кеш ОС
+    global _WORKER_WORDS, _WORKER_BREACH
+    _WORKER_WORDS = CompiledDictionary(words_path) if words_path else None
+    _WORKER_BREACH = BreachDatabase(breach_path, bloom_path) if breach_path else None
+
+def _score_records(chunk: list, mode: str = "classic") -> list:
+    # Пакетна оцінка у воркері (або в тому ж процесі, якщо пулу немає)
+    return [analyze_password(pw, name, surname, date, _WORKER_WORDS, _WORKER_BREACH, mode)
+            for pw, name, surname, date in chunk]
+
+def _audit_chunk(chunk: list, mode: str = "classic") -> list:
+    # Виконується у процесі-воркері; повертає вже серіалізовані рядки JSONL
+    reports = iter(_score_records([r for r in chunk if not isinstance(r, InvalidRecord)], mode))
+    return [json.dumps({"line": r.line, "error": r.error} if isinstance(r, InvalidRecord) else next(reports),
+                       ensure_ascii=False) for r in chunk]
+
+def _chunked(records, chunk_size: int):
+    it = iter(records)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def audit_file(input_path: str, output_path: str, workers: int = None, chunk_size: int = 1000,
+               words_path: str = None, breach_path: str = None, bloom_path: str = None,
+               mode: str = "classic") -> dict:
+    """Пакетний аналіз паролів з файлу у JSONL-звіт (паролі маскуються).
+
+    Записи читаються потоково й обробляються шматками у пулі процесів;
+    некоректні рядки входу дають у звіті рядок {"line", "error"} і рахуються в errors;
+    у роботі одночасно не більше 2 * workers шматків, тож пам'ять не залежить
+    від розміру вхідного файлу. Порядок рядків у звіті збігається з вхідним.
+    words_path — скомпільований словник (compile_wordlist) замість COMMON_WORDS;
+    breach_path/bloom_path — файл витоків і фільтр Блума (build_breach_file);
+    mode — режим оцінки analyze_password.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size має бути >= 1")
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    records = 0
+    errors = 0
+    start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_audit_worker,
+                                initargs=(words_path, breach_path, bloom_path)) as pool:
+        pending = []
+        for chunk in _chunked(iter_records(input_path), chunk_size):
+            errors += sum(isinstance(r, InvalidRecord) for r in chunk)
+            pending.append(pool.submit(_audit_chunk, chunk, mode))
+            if len(pending) >= max_pending:
+                lines = pending.pop(0).result()
+                out.write("\n".join(lines) + "\n")
+                records += len(lines)
+        for fut in pending:
+            lines = fut.result()
+            out.write("\n".join(lines) + "\n")
+            records += len(lines)
+    elapsed = time.perf_counter() - start
+    return {
+        "records": records,
+        "errors": errors,
+        "seconds": elapsed,
+        "records_per_sec": records / elapsed if elapsed > 0 else 0.0,
+    }
+
+# === ЛОКАЛЬНИЙ HTTP-СЕРВІС ОЦІНКИ ===
+#
+# POST /score  {"password", "name", "surname", "date"} -> звіт analyze_password
+# GET  /metrics  лічильники запитів, p50/p99 затримки, пропускна здатність
+# GET  /health
+# Паролі ніде не журналюються: у відповідях і помилках лише маска.
+
+HTTP_MAX_BODY = 64 * 1024
+HTTP_MAX_HEADERS = 100
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+LATENCY_WINDOW = 10000
+
+class ScoringService:
+    """Asyncio HTTP-сервіс, що збирає одночасні запити у мікропакети.
+
+    Запити накопичуються до max_batch штук або max_delay секунд і
+    оцінюються одним викликом у пулі процесів (workers=0 — у цьому ж процесі).
+    Словник і база витоків відкриваються один раз на воркер.
+    """
+
+    def __init__(self, workers: int = 1, max_batch: int = 64, max_delay: float = 0.002,
+                 words_path: str = None, breach_path: str = None, bloom_path: str = None,
+                 mode: str = "classic"):
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.mode = mode
+        self._init_args = (words_path, breach_path, bloom_path)
+        self._pool = None
+        self._queue = None
+        self._slots = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._requests = 0
+        self._errors = 0
+        self._rejected = 0
+        self._batches = 0
+        self._batched_records = 0
+        self._started = time.perf_counter()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080):
+        if self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_audit_worker,
+                                             initargs=self._init_args)
+        else:
+            _init_audit_worker(*self._init_args)
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max(1, self.workers))
+        self._batcher = asyncio.ensure_future(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self._started = time.perf_counter()
+        return self._server
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    async def score(self, record: tuple) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        records = [record for record, _ in batch]
+        try:
+            if self._pool is not None:
+                loop = asyncio.get_running_loop()
+                reports = await loop.run_in_executor(self._pool, _score_records, records, self.mode)
+            else:
+                reports = _score_records(records, self.mode)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self._batches += 1
+            self._batched_records += len(batch)
+            for (_, future), report in zip(batch, reports):
+                if not future.done():
+                    future.set_result(report)
+        finally:
+            self._slots.release()
+
+    def metrics(self) -> dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(q):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+        uptime = time.perf_counter() - self._started
+        return {
+            "requests": self._requests,
+            "errors": self._errors,
+            "rejected": self._rejected,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "throughput_rps": self._requests / uptime if uptime > 0 else 0.0,
+            "batches": self._batches,
+            "avg_batch_size": self._batched_records / self._batches if self._batches else 0.0,
+            "uptime_s": uptime,
+        }
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    # Рядок, довший за ліміт StreamReader (64 КБ), дає ValueError
+                    request_line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    self._record(None, 400, start)
+                    await self._respond(writer, 400, {"error": "Завеликий рядок запиту"})
+                    break
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    self._record(None, 400, start)
+                    await self._respond(writer, 400, {"error": "Некоректний запит"})
+                    break
+                method, path, _ = parts
+                headers = {}
+                header_error = None
+                try:
+                    for count in range(HTTP_MAX_HEADERS + 1):
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        if count == HTTP_MAX_HEADERS:
+                            header_error = "Забагато заголовків"
+                            break
+                        key, _, value = line.decode("latin-1").partition(":")
+                        headers[key.strip().lower()] = value.strip()
+                except (ValueError, asyncio.LimitOverrunError):
+                    header_error = "Завеликий заголовок"
+                if header_error is not None:
+                    self._record(path, 431, start)
+                    await self._respond(writer, 431, {"error": header_error})
+                    break
+                raw_length = headers.get("content-length") or "0"
+                if not (raw_length.isascii() and raw_length.isdigit()):
+                    self._record(path, 400, start)
+                    await self._respond(writer, 400, {"error": "Некоректний Content-Length"})
+                    break
+                length = int(raw_length)
+                if length > HTTP_MAX_BODY:
+                    self._record(path, 413, start)
+                    await self._respond(writer, 413, {"error": "Завеликий запит"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._dispatch(method, path, body)
+                self._record(path, status, start)
+                await self._respond(writer, status, payload)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _record(self, path: str, status: int, start: float):
+        # Лічильники /metrics ведуться лише для /score; запити, шлях яких
+        # не вдалося прочитати (path=None), рахуються як rejected
+        if path is None:
+            self._rejected += 1
+        elif path == "/score":
+            self._requests += 1
+            if status != 200:
+                self._errors += 1
+            self._latencies.append(time.perf_counter() - start)
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> tuple:
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, self.metrics()
+        if path != "/score":
+            return 404, {"error": "Невідомий шлях"}
+        if method != "POST":
+            return 405, {"error": "Потрібен POST"}
+        try:
+            obj = json.loads(body or b"{}")
+            record = tuple(str(obj.get(k) or "") for k in RECORD_FIELDS)
+        except (ValueError, AttributeError):
+            return 400, {"error": "Очікується JSON-об'єкт з полями password, name, surname, date"}
+        if not record[0]:
+            return 400, {"error": "Поле password обов'язкове"}
+        try:
+            return 200, await self.score(record)
+        except Exception as e:
+            # Текст винятку не містить пароля: лише тип помилки
+            return 500, {"error": type(e).__name__}
+
+    async def _respond(self, writer, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+def serve(host: str = "127.0.0.1", port: int = 8080, **options):
+    async def run():
+        service = ScoringService(**options)
+        server = await service.start(host, port)
+        print(f"Сервіс оцінки паролів: http://{host}:{port}/score (метрики: /metrics)")
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+async def _load_test(host: str, port: int, concurrency: int, total: int) -> dict:
+    body = json.dumps({"password": "Qwerty!1995", "name": "Denys", "surname": "", "date": "23.07.1995"}).encode()
+    request = (f"POST /score HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+               f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body
+    latencies = []
+    remaining = [total]
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                start = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000 if latencies else 0.0,
+    }
+
+def load_test(host: str = "127.0.0.1", port: int = 8080, concurrency: int = 32, total: int = 10000) -> dict:
+    """Простий генератор навантаження для ScoringService (keep-alive з'єднання)."""
+    return asyncio.run(_load_test(host, port, concurrency, total))
+
+def cli(argv: list):
+    parser = argparse.ArgumentParser(description="Аналіз паролів (пакетний режим)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_audit = sub.add_parser("audit", help="Пакетний аудит CSV/JSONL у JSONL-звіт")
+    p_audit.add_argument("input", help="CSV або JSONL з полями password,name,surname,date")
+    p_audit.add_argument("output", help="Вихідний JSONL-файл")
+    p_audit.add_argument("--workers", type=int, default=None, help="Кількість процесів (типово: усі ядра)")
+    p_audit.add_argument("--chunk-size", type=int, default=1000, help="Записів на одне завдання")
+    p_audit.add_argument("--words", default=None, help="Скомпільований словник замість вбудованого")
+    p_audit.add_argument("--breached", default=None, help="Файл витоків SHA-1")
+    p_audit.add_argument("--bloom", default=None, help="Фільтр Блума для файлу витоків")
+    p_audit.add_argument("--mode", choices=("classic", "guesses"), default="classic", help="Режим оцінки")
+
+    p_words = sub.add_parser("compile-words", help="Скомпілювати список слів у бінарний словник")
+    p_words.add_argument("input", help="Текстовий файл, по слову на рядок")
+    p_words.add_argument("output", help="Вихідний файл словника")
+
+    p_serve = sub.add_parser("serve", help="Локальний HTTP-сервіс оцінки паролів")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8080)
+    p_serve.add_argument("--workers", type=int, default=1, help="Процесів для оцінки (0 — у процесі сервера)")
+    p_serve.add_argument("--max-batch", type=int, default=64, help="Найбільший мікропакет запитів")
+    p_serve.add_argument("--max-delay-ms", type=float, default=2.0, help="Найдовше очікування наповнення пакета")
+    p_serve.add_argument("--words", default=None, help="Скомпільований словник замість вбудованого")
+    p_serve.add_argument("--breached", default=None, help="Файл витоків SHA-1")
+    p_serve.add_argument("--bloom", default=None, help="Фільтр Блума для файлу витоків")
+    p_serve.add_argument("--mode", choices=("classic", "guesses"), default="classic", help="Режим оцінки")
+
+    p_load = sub.add_parser("loadtest", help="Навантажувальний тест сервісу serve")
+    p_load.add_argument("--host", default="127.0.0.1")
+    p_load.add_argument("--port", type=int, default=8080)
+    p_load.add_argument("--concurrency", type=int, default=32)
+    p_load.add_argument("--requests", type=int, default=10000)
+
+    sub.add_parser("bench-keystroke", help="Виміряти вартість покрокової оцінки (IncrementalScorer)")
+
+    p_breach = sub.add_parser("build-breach", help="Побудувати файл витоків SHA-1 (і фільтр Блума)")
+    p_breach.add_argument("input", help="Хеші SHA-1 у форматі HIBP (HEX або HEX:кількість)")
+    p_breach.add_argument("output", help="Вихідний файл витоків")
+    p_breach.add_argument("--plain", action="store_true", help="Вхід містить паролі, а не хеші")
+    p_breach.add_argument("--prefix-bits", type=int, default=16, help="Розрядність індексу префіксів")
+    p_breach.add_argument("--bloom", default=None, help="Також побудувати фільтр Блума у цей файл")
+    p_breach.add_argument("--fp-rate", type=float, default=0.01, help="Частка хибних спрацювань фільтра")
+
+    args = parser.parse_args(argv)
+    if args.command == "audit":
+        stats = audit_file(args.input, args.output, args.workers, args.chunk_size, args.words,
+                           args.breached, args.bloom, args.mode)
+        print(f"Оброблено записів: {stats['records']} за {stats['seconds']:.2f} с "
+              f"({stats['records_per_sec']:.0f} записів/с)")
+        if stats["errors"]:
+            print(f"Некоректних рядків: {stats['errors']} (див. поле error у звіті)")
+    elif args.command == "compile-words":
+        start = time.perf_counter()
+        count = compile_wordlist(args.input, args.output)
+        print(f"Скомпільовано слів: {count} за {time.perf_counter() - start:.2f} с -> {args.output}")
+    elif args.command == "serve":
+        serve(args.host, args.port, workers=args.workers, max_batch=args.max_batch,
+              max_delay=args.max_delay_ms / 1000, words_path=args.words, breach_path=args.breached,
+              bloom_path=args.bloom, mode=args.mode)
+    elif args.command == "loadtest":
+        stats = load_test(args.host, args.port, args.concurrency, args.requests)
+        print(f"Запитів: {stats['requests']}, {stats['rps']:.0f} запитів/с, "
+              f"p50 {stats['p50_ms']:.2f} мс, p99 {stats['p99_ms']:.2f} мс")
+    elif args.command == "bench-keystroke":
+        print(f"{'Довжина':>8} {'Натискання, мкс':>16} {'Повний аналіз, мкс':>19}")
+        for row in benchmark_incremental():
+            print(f"{row['length']:>8} {row['keystroke_us']:>16.1f} {row['full_analysis_us']:>19.1f}")
+    elif args.command == "build-breach":
+        count = build_breach_file(args.input, args.output, args.plain, args.prefix_bits)
+        print(f"Записано хешів: {count} -> {args.output}")
+        if args.bloom:
+            size = build_bloom_filter(args.output, args.bloom, args.fp_rate)
+            print(f"Фільтр Блума: {size} байт -> {args.bloom}")
+
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        cli(sys.argv[1:])
+    else:
+        main()
@@ -1,268 +1,243 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext
-from tabulate import tabulate
-import string
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import argparse
+import os
+import sys
+import time
+import queue
+import threading
 import numpy as np
-from math import gcd
-
-# --- 1. КОНСТАНТИ ТА ДАНІ ---
-ALPHABET_UA = 'АБВГҐДЕЄЖЗИІЇЙКЛМНОПРСТУФХЦЧШЩЬЮЯ'
-ALPHABET_UA_LOWER = 'абвгґдеєжзиіїйклмнопрстуфхцчшщьюя'
-ALPHABET_LEN = len(ALPHABET_UA)
-
-# Еталонні частоти для української мови
-UA_FREQ_EXPECTED = {
-    'А': 7.6, 'Е': 6.9, 'Н': 6.6, 'І': 5.8, 'Т': 5.6, 'О': 5.3, 'Р': 4.8, 'И': 4.6,
-    'В': 4.5, 'С': 4.0, 'К': 3.7, 'Л': 3.6, 'П': 3.4, 'М': 3.2, 'Д': 2.8, 'У': 2.6,
-    'Я': 2.5, 'З': 2.2, 'Ч': 1.8, 'Б': 1.6, 'Й': 1.4, 'Х': 1.2, 'Ж': 1.0, 'Г': 0.9,
-    'Ц': 0.8, 'Є': 0.7, 'Ї': 0.6, 'Ш': 0.6, 'Ю': 0.5, 'Щ': 0.4, 'Ф': 0.3, 'Ґ': 0.1,
-    'Ь': 0.0
-}
-EXPECTED_FREQ_VECTOR = np.array([UA_FREQ_EXPECTED.get(ALPHABET_UA[i], 0.0) / 100 for i in range(ALPHABET_LEN)])
-
-
-# --- 2. ЛОГІКА ШИФРУВАННЯ ---
-
-def generate_caesar_key(date_str):
-    total_sum = 0
-    for char in date_str:
-        if char.isdigit():
-            total_sum += int(char)
-    return total_sum % ALPHABET_LEN
-
-
-def generate_vigenere_key(surname):
-    key = "".join(filter(lambda x: x.isalpha(), surname)).upper()
-    return key if key else "КРИПТО"
-
-
-def process_text(text, shift, cipher_type='caesar', mode='encrypt', key_stream=None):
-    result = ""
-    stream_index = 0
-
-    for char in text:
-        current_shift = shift
-
-        if cipher_type == 'vigenere' and key_stream and (char in ALPHABET_UA or char in ALPHABET_UA_LOWER):
-            key_char = key_stream[stream_index]
-            key_idx = ALPHABET_UA.find(key_char)
-            current_shift = key_idx
-
-            if mode == 'decrypt':
-                current_shift = -current_shift
-
-            stream_index = (stream_index + 1) % len(key_stream)
-
-        if char in ALPHABET_UA:
-            alphabet = ALPHABET_UA
-            index = alphabet.find(char)
-            new_index = (index + current_shift) % ALPHABET_LEN
-            result += alphabet[new_index]
-        elif char in ALPHABET_UA_LOWER:
-            alphabet = ALPHABET_UA_LOWER
-            index = alphabet.find(char)
-            new_index = (index + current_shift) % ALPHABET_LEN
-            result += alphabet[new_index]
-        else:
-            result += char
-    return result
-
-
-def vigenere_key_stream(plaintext, key):
-    key_stream = ""
-    key_index = 0
-    key_upper = key.upper()
-    for char in plaintext:
-        if char in ALPHABET_UA or char in ALPHABET_UA_LOWER:
-            key_stream += key_upper[key_index % len(key_upper)]
-            key_index += 1
-        else:
-            key_stream += char
-    return key_stream
-
-
-def caesar_decrypt(ciphertext, shift):
-    return process_text(ciphertext, -shift, cipher_type='caesar', mode='decrypt')
-
-
-# --- 3. ФУНКЦІЇ КРИПТОАНАЛІЗУ ---
-
-def get_frequency_count(text):
-    text_upper = "".join(filter(lambda x: x in ALPHABET_UA, text.upper()))
-    counts = {char: 0 for char in ALPHABET_UA}
-    for char in text_upper:
-        counts[char] += 1
-    return counts, len(text_upper)
-
-
-def get_frequency_perc(text):
-    counts, total_letters = get_frequency_count(text)
-    if total_letters == 0:
-        return {char: 0 for char in ALPHABET_UA}
-
-    frequencies = {char: (count / total_letters * 100) for char, count in counts.items()}
-    return frequencies
-
+from Лр2_core import (ALPHABET_LEN, ALPHABET_UA, analyze_caesar_frequency, caesar_brute_force, caesar_decrypt,
+                      cli, default_ngram_model, generate_caesar_key, generate_vigenere_key, get_frequency_perc,
+                      kasiski_test, process_text, recover_vigenere_key, tabulate,
+                      vigenere_index_of_coincidence_test, vigenere_process)
 
-def analyze_caesar_frequency(ciphertext):
-    cipher_freq = get_frequency_perc(ciphertext)
+# tkinter і matplotlib завантажуються лише при створенні CipherApp (див. _load_gui_modules)
+tk = ttk = scrolledtext = FigureCanvasTkAgg = None
 
-    if not cipher_freq or max(cipher_freq.values()) == 0:
-        return "Недостатньо літер для частотного аналізу.", 0
 
-    most_common_cipher = max(cipher_freq, key=cipher_freq.get)
+def _load_gui_modules():
+    global tk, ttk, scrolledtext, FigureCanvasTkAgg
+    if tk is not None:
+        return
+    import tkinter
+    from tkinter import ttk as tkinter_ttk, scrolledtext as tkinter_scrolledtext
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as canvas_class
+    tk, ttk, scrolledtext = tkinter, tkinter_ttk, tkinter_scrolledtext
+    FigureCanvasTkAgg = canvas_class
 
-    idx_cipher = ALPHABET_UA.find(most_common_cipher)
-    idx_expected = ALPHABET_UA.find('А')
 
-    guessed_shift = (idx_cipher - idx_expected) % ALPHABET_LEN
-
-    output = "--- ЧАСТОТНИЙ АНАЛІЗ (ШИФР ЦЕЗАРЯ) ---\n"
-    output += f"1. Найчастіша літера в шифротексті: '{most_common_cipher}' ({cipher_freq[most_common_cipher]:.2f}%)\n"
-    output += f"2. Очікувана найчастіша літера (гіпотеза): 'А'\n"
-    output += f"3. Обчислений зсув: ({idx_cipher} - {idx_expected}) mod {ALPHABET_LEN} = {guessed_shift}\n"
-
-    decrypted_text = caesar_decrypt(ciphertext, guessed_shift)
-    output += "\n--- ЙМОВІРНЕ РОЗШИФРУВАННЯ (за гіпотезою 'А') ---\n"
-    output += decrypted_text[:100] + "..."
-
-    return output, guessed_shift
-
-
-def calculate_ic(text):
-    counts, total_letters = get_frequency_count(text)
-
-    if total_letters < 2:
-        return 0.0
-
-    sum_ni_ni_minus_1 = sum(count * (count - 1) for count in counts.values())
-    ic = sum_ni_ni_minus_1 / (total_letters * (total_letters - 1))
-    return ic
-
-
-def kasiski_test(ciphertext, max_key_len=10):
-    text_upper = "".join(filter(lambda x: x in ALPHABET_UA, ciphertext.upper()))
-
-    results = {}
-    for length in range(3, 6):
-        for i in range(len(text_upper) - length):
-            sequence = text_upper[i:i + length]
-            if sequence in results:
-                results[sequence].append(i)
-            else:
-                results[sequence] = [i]
+# --- 4. РЕАЛІЗАЦІЯ ГРАФІЧНОГО ІНТЕРФЕЙСУ (TKINTER) ---
 
-    repeated = {seq: positions for seq, positions in results.items() if len(positions) > 1}
+DEBOUNCE_MS = 150  # повторні натискання в цьому вікні запускають лише останній запит
+POLL_MS = 50
 
-    if not repeated:
-        return "Не знайдено повторюваних послідовностей для аналізу Касіскі. Спробуйте довший текст.", []
 
-    output = "--- МЕТОД КАСІСКІ: ПОШУК ПОВТОРЕНЬ ---\n"
-    all_distances = []
+class JobCancelled(Exception):
+    pass
 
-    for seq, positions in repeated.items():
-        distances = [positions[i] - positions[i - 1] for i in range(1, len(positions))]
-        output += f"Послідовність '{seq}': Позиції: {positions}, Відстані: {distances}\n"
-        all_distances.extend(distances)
 
-    if not all_distances:
-        return output + "Не знайдено відстаней для аналізу НСД.", []
+def _progress_step(progress, cancelled):
+    def step(fraction, label):
+        if cancelled is not None and cancelled.is_set():
+            raise JobCancelled()
+        if progress is not None:
+            progress(fraction, label)
+    return step
 
-    g = all_distances[0]
-    for distance in all_distances[1:]:
-        g = gcd(g, distance)
 
-    output += f"\n--- ВИЗНАЧЕННЯ ДОВЖИНИ КЛЮЧА ---\n"
-    output += f"Знайдені відстані: {sorted(list(set(all_distances)))}\n"
-    output += f"Обчислений НСД для відстаней (ймовірна довжина ключа): {g}\n"
+def crypto_analysis(cipher_type, ciphertext, caesar_shift, original_text="", progress=None, cancelled=None):
+    """Звіт криптоаналізу та дані графіка без звертань до Tk.
 
-    possible_lengths = [i for i in range(1, max_key_len + 1) if g % i == 0]
+    progress(частка, етап) викликається перед кожним етапом; якщо cancelled
+    (threading.Event) встановлено, робота переривається JobCancelled.
+    """
+    step = _progress_step(progress, cancelled)
+    report = []
+    if cipher_type == "Цезар":
+        step(0.2, "Brute Force")
+        report.append(caesar_brute_force(ciphertext, caesar_shift, model=default_ngram_model()) + "\n\n")
+        step(0.6, "Частотний аналіз")
+        report.append(analyze_caesar_frequency(ciphertext, default_ngram_model())[0])
+        plot = ('frequency', original_text, ciphertext)
+    else:
+        step(0.2, "Метод Касіскі")
+        report.append(kasiski_test(ciphertext)[0] + "\n\n")
+        step(0.45, "Індекс Збігу")
+        ic_output, ics = vigenere_index_of_coincidence_test(ciphertext)
+        report.append(ic_output)
+        step(0.6, "Відновлення ключа")
+        report.append("\n\n" + recover_vigenere_key(ciphertext, model=default_ngram_model())[0])
+        plot = ('ic', ics)
+    step(0.9, "Візуалізація")
+    return {'ciphertext': ciphertext, 'crypto_output': "".join(report), 'plot': plot}
+
+
+def encrypt_and_analyze(original_text, cipher_type, caesar_shift, vigenere_key, progress=None, cancelled=None):
+    """Шифрування і криптоаналіз для фонового потоку (див. crypto_analysis)."""
+    _progress_step(progress, cancelled)(0.0, "Шифрування")
+    if cipher_type == "Цезар":
+        ciphertext = process_text(original_text, caesar_shift, cipher_type='caesar', mode='encrypt')
+    else:
+        ciphertext, _ = vigenere_process(original_text, vigenere_key, 'encrypt')
+    return crypto_analysis(cipher_type, ciphertext, caesar_shift, original_text, progress, cancelled)
 
-    return output, possible_lengths
 
+class PlotView:
+    """Постійна фігура для частотного графіка та графіка IC.
 
-def vigenere_index_of_coincidence_test(ciphertext, max_len=10):
-    text_upper = "".join(filter(lambda x: x in ALPHABET_UA, ciphertext.upper()))
+    Фігура створюється через matplotlib.figure.Figure (не pyplot), тож не
+    накопичується в реєстрі pyplot. Стовпці й лінія — анімовані артисти:
+    якщо осі не змінились, вони перемальовуються поверх збереженого фону
+    (blit), інакше — повне перемалювання полотна.
+    """
 
-    ics = {}
     IC_UA_EXPECTED = 0.057
+    IC_RANDOM_EXPECTED = 1.0 / ALPHABET_LEN
+
+    def __init__(self, canvas_factory):
+        from matplotlib.figure import Figure
+        self.figure = Figure(figsize=(10, 5))
+        self.canvas = canvas_factory(self.figure)
+        self.ax = self.figure.add_subplot()
+        self.kind = None
+        self.animated = []
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # Після кожного повного перемалювання (і зміни розміру вікна) — новий фон
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self.animated:
+            self.figure.draw_artist(artist)
+
+    def _refresh(self, full):
+        if full or self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        for artist in self.animated:
+            self.figure.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
+
+    def _reset(self, kind):
+        self.ax.clear()
+        self.kind = kind
+        self.animated = []
+
+    def show_frequency(self, data1, data2, label1, label2):
+        top = max(max(data1, default=0), max(data2, default=0), 1e-9) * 1.05
+        full = self.kind != 'frequency' or top > self.ax.get_ylim()[1] or top < self.ax.get_ylim()[1] / 2
+        if self.kind != 'frequency':
+            self._reset('frequency')
+            x = np.arange(ALPHABET_LEN)
+            width = 0.35
+            self.bars1 = self.ax.bar(x - width / 2, data1, width, label=label1, color='blue', alpha=0.6,
+                                     animated=True)
+            self.bars2 = self.ax.bar(x + width / 2, data2, width, label=label2, color='red', alpha=0.6,
+                                     animated=True)
+            self.animated = list(self.bars1) + list(self.bars2)
+            self.ax.set_ylabel('Частота (%)')
+            self.ax.set_title('Частотний аналіз: Вихідний vs Шифр Цезаря')
+            self.ax.set_xticks(x)
+            self.ax.set_xticklabels(list(ALPHABET_UA))
+        else:
+            for rect, height in zip(self.bars1, data1):
+                rect.set_height(height)
+            for rect, height in zip(self.bars2, data2):
+                rect.set_height(height)
+        if full:
+            self.ax.set_ylim(0, top)
+            self.bars1.set_label(label1)
+            self.bars2.set_label(label2)
+            self.ax.legend()
+            self.figure.tight_layout()
+        self._refresh(full)
+
+    def show_ic(self, ics):
+        lengths = list(ics.keys())
+        ic_values = list(ics.values())
+        top = max(max(ic_values, default=0), self.IC_UA_EXPECTED) * 1.1
+        full = (self.kind != 'ic' or list(self.line.get_xdata()) != lengths
+                or top > self.ax.get_ylim()[1] or min(ic_values, default=0) < self.ax.get_ylim()[0])
+        if self.kind != 'ic':
+            self._reset('ic')
+            self.line, = self.ax.plot(lengths, ic_values, marker='o', linestyle='-', color='purple',
+                                      label='Середній IC', animated=True)
+            self.animated = [self.line]
+            self.ax.axhline(self.IC_UA_EXPECTED, color='green', linestyle='--',
+                            label=f'IC Укр. ({self.IC_UA_EXPECTED:.4f})')
+            self.ax.axhline(self.IC_RANDOM_EXPECTED, color='gray', linestyle=':',
+                            label=f'IC Випадк. ({self.IC_RANDOM_EXPECTED:.4f})')
+            self.ax.set_xlabel('Гіпотетична довжина ключа (L)')
+            self.ax.set_ylabel('Індекс Збігу (IC)')
+            self.ax.set_title('Індекс Збігу для визначення довжини ключа Віженера')
+            self.ax.legend()
+        else:
+            self.line.set_data(lengths, ic_values)
+        if full:
+            self.ax.set_xticks(lengths)
+            self.ax.set_xlim(min(lengths, default=0) - 0.5, max(lengths, default=1) + 0.5)
+            self.ax.set_ylim(0, top)
+            self.figure.tight_layout()
+        self._refresh(full)
 
-    for length in range(1, max_len + 1):
-        ic_sum = 0
-        for i in range(length):
-            sub_text = text_upper[i::length]
-            ic_sum += calculate_ic(sub_text)
-
-        ics[length] = ic_sum / length
-
-    output = "--- ІНДЕКС ЗБІГУ (IC) ДЛЯ ВИЗНАЧЕННЯ ДОВЖИНИ КЛЮЧА ---\n"
-
-    ic_data = []
-    best_length = 1
-    min_diff = float('inf')
-
-    for length, ic_val in ics.items():
-        ic_data.append([length, f"{ic_val:.4f}"])
-        diff = abs(ic_val - IC_UA_EXPECTED)
-        if diff < min_diff:
-            min_diff = diff
-            best_length = length
-
-    output += tabulate(ic_data, headers=["Довжина ключа (L)", "Середній IC"], tablefmt="fancy_grid")
-    output += f"\nГіпотеза: Найкраща довжина ключа (IC найближчий до {IC_UA_EXPECTED:.4f}): {best_length}"
-
-    return output, ics
-
-
-def caesar_brute_force(ciphertext, correct_shift):
-
-    # Виконуємо повний перебір і формуємо повний список результатів
-    all_results = [
-        [i, f"{caesar_decrypt(ciphertext, i)[:35]}...", " <--- ПРАВИЛЬНИЙ КЛЮЧ" if i == correct_shift else ""]
-        for i in range(1, ALPHABET_LEN + 1)
-    ]
-
-    # Визначаємо, які індекси потрібно відобразити (зсув - 1)
-    indices_to_display = list(range(10))  # Перші 10 (зсуви 1-10)
-
-    # Додаємо індекс правильного зсуву, якщо він не входить у перші 10
-    if correct_shift > 10 and correct_shift < ALPHABET_LEN:
-        indices_to_display.append(correct_shift - 1)
-
-    # Додаємо індекс останнього зсуву, якщо він не збігається з правильним і не входить у перші 10
-    if ALPHABET_LEN > 10 and ALPHABET_LEN != correct_shift:
-        indices_to_display.append(ALPHABET_LEN - 1)
-
-    # Створюємо унікальний та відсортований список індексів
-    unique_indices = sorted(list(set(indices_to_display)))
-
-    display_results = []
-    last_index = -1
-
-    # Формуємо компактний список для відображення
-    for idx in unique_indices:
-        if idx > last_index + 1 and last_index != -1:
-            # Додаємо "..." якщо є пропуск у послідовності зсувів
-            display_results.append([f"...", f"...", f"..."])
-
-        display_results.append(all_results[idx])
-        last_index = idx
-
-    output = "--- BRUTE FORCE АТАКА (ПОВНИЙ ПЕРЕБІР) ---\n"
-    output += f"ВСЬОГО СПРОБ: {ALPHABET_LEN}\n"
-
-    output += tabulate(display_results, headers=["Зсув", "Частина розшифрованого тексту", "Статус"],
-                       tablefmt="fancy_grid")
-    output += "\n\nПРИМІТКА: Виконано повний перебір усіх 33 зсувів. Відображено початок, правильний та кінець для компактності."
-    return output
 
+def _rss_mb():
+    # Поточний (не піковий) резидентний обсяг пам'яті процесу, Linux
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def plot_memory_check(redraws=1000, max_growth_mb=20.0):
+    """Перевірка на витік пам'яті: redraws перемалювань PlotView на полотні Agg (без дисплея).
+
+    Графіки чергуються блоками по 50 оновлень на місці (зміна типу — повна
+    перебудова осей); повертає RSS до/після,
+    швидкість і чи вклався приріст у max_growth_mb.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    rng = np.random.default_rng(0)
+    view = PlotView(FigureCanvasAgg)
+    for _ in range(20):  # прогрів: шрифти, кеші matplotlib
+        view.show_frequency(rng.random(ALPHABET_LEN) * 10, rng.random(ALPHABET_LEN) * 10, "A", "B")
+        view.show_ic({length: 0.03 + rng.random() * 0.03 for length in range(1, 11)})
+    before = _rss_mb()
+    start = time.perf_counter()
+    for i in range(redraws):
+        if (i // 50) % 2:
+            view.show_ic({length: 0.03 + rng.random() * 0.03 for length in range(1, 11)})
+        else:
+            view.show_frequency(rng.random(ALPHABET_LEN) * 10, rng.random(ALPHABET_LEN) * 10, "A", "B")
+    elapsed = time.perf_counter() - start
+    after = _rss_mb()
+    return {'redraws': redraws, 'rss_before_mb': before, 'rss_after_mb': after,
+            'redraws_per_sec': redraws / elapsed if elapsed > 0 else 0.0,
+            'bounded': after - before <= max_growth_mb}
+
+
+def plot_memory_cli(argv):
+    """Команда plot-memory-check: код виходу 1, якщо пам'ять під час перемалювань не обмежена."""
+    parser = argparse.ArgumentParser(prog="plot-memory-check",
+                                     description="Регресійна перевірка пам'яті графіків CipherApp (без дисплея)")
+    parser.add_argument("--redraws", type=int, default=1000, help="Кількість перемалювань")
+    parser.add_argument("--max-growth-mb", type=float, default=20.0, help="Допустимий приріст RSS, МБ")
+    args = parser.parse_args(argv)
+    result = plot_memory_check(args.redraws, args.max_growth_mb)
+    print(f"Перемалювань: {result['redraws']} ({result['redraws_per_sec']:.0f}/с), "
+          f"RSS: {result['rss_before_mb']:.1f} -> {result['rss_after_mb']:.1f} МБ")
+    if not result['bounded']:
+        print(f"ПОМИЛКА: приріст пам'яті перевищує {args.max_growth_mb} МБ")
+        return 1
+    print("OK: пам'ять обмежена")
+    return 0
 
-# --- 4. РЕАЛІЗАЦІЯ ГРАФІЧНОГО ІНТЕРФЕЙСУ (TKINTER) ---
 
 class CipherApp:
     def __init__(self, master):
+        _load_gui_modules()
         self.master = master
         master.title("Порівняльний аналіз шифрів")
         master.geometry("1000x850")
@@ -282,6 +257,14 @@ class CipherApp:
         self.vigenere_key = ""
         self.original_text = ""
 
+        # Фонова робота: результати й прогрес приходять у чергу з номером запиту,
+        # відображаються лише для останнього (self._job_id)
+        self._job_id = 0
+        self._cancel_event = None
+        self._pending_start = None
+        self._polling = False
+        self._messages = queue.Queue()
+
         self.create_widgets()
 
 
@@ -339,6 +322,13 @@ class CipherApp:
                                          style='TButton', state=tk.DISABLED)
         self.decrypt_button.pack(side=tk.LEFT, expand=True, fill="x", padx=5)
 
+        progress_frame = ttk.Frame(settings_frame)
+        progress_frame.pack(fill="x")
+        self.progress = ttk.Progressbar(progress_frame, maximum=1.0, length=200)
+        self.progress.pack(side=tk.LEFT, padx=5)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(progress_frame, textvariable=self.status_var).pack(side=tk.LEFT, padx=5)
+
         # --- Блокнот для РЕЗУЛЬТАТІВ ---
         self.notebook = ttk.Notebook(self.master)
         self.notebook.pack(padx=10, pady=5, fill="both", expand=True)
@@ -390,6 +380,7 @@ class CipherApp:
                                           anchor="center")
         self.plot_placeholder.pack(fill="both", expand=True)
         self.canvas = None
+        self.plot_view = None
 
     def draw_frequency_graph(self, text1, text2, label1, label2):
         freq1 = get_frequency_perc(text1)
@@ -399,108 +390,111 @@ class CipherApp:
         data1 = [freq1.get(char, 0) for char in labels]
         data2 = [freq2.get(char, 0) for char in labels]
 
-        fig, ax = plt.subplots(figsize=(10, 5))
-
-        x = np.arange(ALPHABET_LEN)
-        width = 0.35
-
-        ax.bar(x - width / 2, data1, width, label=label1, color='blue', alpha=0.6)
-        ax.bar(x + width / 2, data2, width, label=label2, color='red', alpha=0.6)
-
-        ax.set_ylabel('Частота (%)')
-        ax.set_title('Частотний аналіз: Вихідний vs Шифр Цезаря')
-        ax.set_xticks(x)
-        ax.set_xticklabels(labels)
-        ax.legend()
-        plt.tight_layout()
-
-        self._update_plot_canvas(fig)
+        self._plot_view().show_frequency(data1, data2, label1, label2)
 
     def draw_ic_graph(self, ics):
+        self._plot_view().show_ic(ics)
 
-        IC_UA_EXPECTED = 0.057
-        IC_RANDOM_EXPECTED = 1.0 / ALPHABET_LEN
-
-        lengths = list(ics.keys())
-        ic_values = list(ics.values())
-
-        fig, ax = plt.subplots(figsize=(10, 5))
-
-        ax.plot(lengths, ic_values, marker='o', linestyle='-', color='purple', label='Середній IC')
-        ax.axhline(IC_UA_EXPECTED, color='green', linestyle='--', label=f'IC Укр. ({IC_UA_EXPECTED:.4f})')
-        ax.axhline(IC_RANDOM_EXPECTED, color='gray', linestyle=':', label=f'IC Випадк. ({IC_RANDOM_EXPECTED:.4f})')
-
-        ax.set_xlabel('Гіпотетична довжина ключа (L)')
-        ax.set_ylabel('Індекс Збігу (IC)')
-        ax.set_title('Індекс Збігу для визначення довжини ключа Віженера')
-        ax.set_xticks(lengths)
-        ax.legend()
-        plt.tight_layout()
-
-        self._update_plot_canvas(fig)
-
-    def _update_plot_canvas(self, fig):
-        if self.canvas:
-            self.canvas.get_tk_widget().destroy()
-
-        self.plot_placeholder.pack_forget()
-        self.canvas = FigureCanvasTkAgg(fig, master=self.plot_canvas_frame)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+    def _plot_view(self):
+        # Одна фігура й одне полотно на весь сеанс; графіки оновлюються на місці
+        if self.plot_view is None:
+            self.plot_placeholder.pack_forget()
+            self.plot_view = PlotView(lambda fig: FigureCanvasTkAgg(fig, master=self.plot_canvas_frame))
+            self.canvas = self.plot_view.canvas
+            self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        return self.plot_view
 
     def update_crypto_tab(self, cipher_type, ciphertext):
-        self.crypto_text.delete("1.0", tk.END)
-
-        if cipher_type == "Цезар":
-            # 1. Brute Force
-            brute_output = caesar_brute_force(ciphertext, self.caesar_shift)
-            self.crypto_text.insert(tk.END, brute_output + "\n\n")
-
-            # 2. Частотний аналіз
-            freq_output, _ = analyze_caesar_frequency(ciphertext)
-            self.crypto_text.insert(tk.END, freq_output)
+        # Синхронний варіант (без потоку) для виклику з коду
+        self._render_crypto(crypto_analysis(cipher_type, ciphertext, self.caesar_shift, self.original_text))
 
-            # Візуалізація: Частотний графік
-            self.draw_frequency_graph(self.original_text, ciphertext, "Вихідний текст", "Шифр Цезаря")
-
-        elif cipher_type == "Віженер":
-            # 1. Метод Касіскі
-            kasiski_output, _ = kasiski_test(ciphertext)
-            self.crypto_text.insert(tk.END, kasiski_output + "\n\n")
-
-            # 2. Індекс Збігу
-            ic_output, ics = vigenere_index_of_coincidence_test(ciphertext)
-            self.crypto_text.insert(tk.END, ic_output)
+    def _render_crypto(self, result):
+        self.crypto_text.delete("1.0", tk.END)
+        self.crypto_text.insert(tk.END, result['crypto_output'])
 
-            # Візуалізація: Графік Індексу Збігу
-            self.draw_ic_graph(ics)
+        # Візуалізація: частотний графік (Цезар) або графік Індексу Збігу (Віженер)
+        plot = result['plot']
+        if plot[0] == 'frequency':
+            self.draw_frequency_graph(plot[1], plot[2], "Вихідний текст", "Шифр Цезаря")
+        else:
+            self.draw_ic_graph(plot[1])
 
     def run_encrypt(self):
-        # Зчитування та генерація ключів
-        self.original_text = self.text_input.get("1.0", tk.END).strip()
+        # Зчитування та генерація ключів (у головному потоці — тут лише віджети)
+        original_text = self.text_input.get("1.0", tk.END).strip()
         date_str = self.date_var.get().strip()
         surname = self.surname_var.get().strip()
+        request = (original_text, self.cipher_choice.get(), generate_caesar_key(date_str),
+                   generate_vigenere_key(surname))
+
+        # Debounce: запит стартує після паузи; новіше натискання замінює відкладений
+        if self._pending_start is not None:
+            self.master.after_cancel(self._pending_start)
+        self.status_var.set("Очікування...")
+        self._pending_start = self.master.after(DEBOUNCE_MS, self._start_job, request)
+
+    def _start_job(self, request):
+        self._pending_start = None
+        # Скасування попереднього запиту: потік зупиниться на найближчому етапі
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        self._job_id += 1
+        self._cancel_event = threading.Event()
+        self.progress['value'] = 0.0
+        threading.Thread(target=self._run_job, args=(self._job_id, self._cancel_event, request),
+                         daemon=True).start()
+        if not self._polling:
+            self._polling = True
+            self.master.after(POLL_MS, self._poll_job)
+
+    def _run_job(self, job_id, cancelled, request):
+        # Фоновий потік: жодних звертань до Tk, лише черга повідомлень
+        def progress(fraction, label):
+            self._messages.put((job_id, 'progress', (fraction, label)))
+        try:
+            result = encrypt_and_analyze(*request, progress=progress, cancelled=cancelled)
+        except JobCancelled:
+            return
+        except Exception as e:
+            self._messages.put((job_id, 'error', e))
+        else:
+            self._messages.put((job_id, 'done', (request, result)))
+
+    def _poll_job(self):
+        finished = False
+        while True:
+            try:
+                job_id, kind, payload = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if job_id != self._job_id:
+                continue  # застарілий запит
+            if kind == 'progress':
+                self.progress['value'] = payload[0]
+                self.status_var.set(payload[1] + "...")
+            elif kind == 'error':
+                self.status_var.set(f"Помилка: {payload}")
+                finished = True
+            else:
+                self._show_encryption(*payload)
+                finished = True
+        if finished and self._pending_start is None:
+            self._polling = False
+        else:
+            self.master.after(POLL_MS, self._poll_job)
 
-        self.caesar_shift = generate_caesar_key(date_str)
-        self.vigenere_key = generate_vigenere_key(surname)
-
-        cipher_type = self.cipher_choice.get()
+    def _show_encryption(self, request, result):
+        self.original_text, cipher_type, self.caesar_shift, self.vigenere_key = request
         self.current_cipher_type = cipher_type
+        self.current_ciphertext = result['ciphertext']
 
-        # Шифрування
         if cipher_type == "Цезар":
-            self.current_ciphertext = process_text(self.original_text, self.caesar_shift, cipher_type='caesar',
-                                                   mode='encrypt')
             key_info = f"Зсув: {self.caesar_shift}"
-
-        elif cipher_type == "Віженер":
-            self.current_ciphertext = process_text(self.original_text, 0, cipher_type='vigenere', mode='encrypt',
-                                                   key_stream=vigenere_key_stream(self.original_text,
-                                                                                  self.vigenere_key))
+        else:
             key_info = f"Слово: '{self.vigenere_key}'"
 
         # Оновлення вкладок Криптоаналізу та Візуалізації
-        self.update_crypto_tab(cipher_type, self.current_ciphertext)
+        self._render_crypto(result)
 
         # Оновлення результатів демонстрації
         results_output = f"--- ДЕМОНСТРАЦІЯ ШИФРУВАННЯ ---\n"
@@ -513,6 +507,8 @@ class CipherApp:
         self.results_text.delete("1.0", tk.END)
         self.results_text.insert(tk.END, results_output)
 
+        self.progress['value'] = 1.0
+        self.status_var.set("Готово")
         self.decrypt_button.config(state=tk.NORMAL)
 
     def run_decrypt(self):
@@ -527,8 +523,7 @@ class CipherApp:
             decrypted_text = caesar_decrypt(self.current_ciphertext, self.caesar_shift)
             key_info = f"Зсув: {self.caesar_shift}"
         elif cipher_type == "Віженер":
-            decrypted_text = process_text(self.current_ciphertext, 0, cipher_type='vigenere', mode='decrypt',
-                                          key_stream=vigenere_key_stream(self.current_ciphertext, self.vigenere_key))
+            decrypted_text, _ = vigenere_process(self.current_ciphertext, self.vigenere_key, 'decrypt')
             key_info = f"Слово: '{self.vigenere_key}'"
         else:
             decrypted_text = "Помилка розшифрування."
@@ -565,14 +560,18 @@ class CipherApp:
 
 # --- ЗАПУСК ПРОГРАМИ ---
 if __name__ == "__main__":
-    try:
-        tabulate
-        plt
-        np.array
-    except (NameError, AttributeError):
-        print("Помилка: Необхідні бібліотеки 'tabulate', 'matplotlib' та 'numpy' не встановлені.")
-        print("Будь ласка, встановіть їх командою: pip install tabulate matplotlib numpy")
+    if sys.argv[1:2] == ["plot-memory-check"]:
+        sys.exit(plot_memory_cli(sys.argv[2:]))
+    elif len(sys.argv) > 1:
+        cli(sys.argv[1:])
     else:
-        root = tk.Tk()
-        app = CipherApp(root)
-        root.mainloop()
\ No newline at end of file
+        try:
+            _load_gui_modules()
+            from tabulate import tabulate as _check_tabulate
+        except ImportError:
+            print("Помилка: Необхідні бібліотеки 'tabulate', 'matplotlib' та 'numpy' не встановлені.")
+            print("Будь ласка, встановіть їх командою: pip install tabulate matplotlib numpy")
+        else:
+            root = tk.Tk()
+            app = CipherApp(root)
+            root.mainloop()
\ No newline at end of file
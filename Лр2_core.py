@@ -0,0 +1,1288 @@
+"""Шифри Цезаря, Віженера та підстановки і їх криптоаналіз без графічного інтерфейсу.
+
+Імпорт не тягне tkinter і matplotlib; tabulate завантажується при першому
+форматуванні звіту. Лр2.py будує GUI поверх цього модуля.
+"""
+import argparse
+import codecs
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+import random
+import signal
+import numpy as np
+
+
+def tabulate(*args, **kwargs):
+    # Відкладений імпорт: пакетним задачам без звітів tabulate не потрібен
+    from tabulate import tabulate as _tabulate
+    return _tabulate(*args, **kwargs)
+
+
+# --- 1. КОНСТАНТИ ТА ДАНІ ---
+ALPHABET_UA = 'АБВГҐДЕЄЖЗИІЇЙКЛМНОПРСТУФХЦЧШЩЬЮЯ'
+ALPHABET_UA_LOWER = 'абвгґдеєжзиіїйклмнопрстуфхцчшщьюя'
+ALPHABET_LEN = len(ALPHABET_UA)
+
+# Еталонні частоти для української мови (запасні, якщо профіль корпусу не побудовано)
+UA_FREQ_DEFAULT = {
+    'А': 7.6, 'Е': 6.9, 'Н': 6.6, 'І': 5.8, 'Т': 5.6, 'О': 5.3, 'Р': 4.8, 'И': 4.6,
+    'В': 4.5, 'С': 4.0, 'К': 3.7, 'Л': 3.6, 'П': 3.4, 'М': 3.2, 'Д': 2.8, 'У': 2.6,
+    'Я': 2.5, 'З': 2.2, 'Ч': 1.8, 'Б': 1.6, 'Й': 1.4, 'Х': 1.2, 'Ж': 1.0, 'Г': 0.9,
+    'Ц': 0.8, 'Є': 0.7, 'Ї': 0.6, 'Ш': 0.6, 'Ю': 0.5, 'Щ': 0.4, 'Ф': 0.3, 'Ґ': 0.1,
+    'Ь': 1.6
+}
+
+# Профіль частот, побудований profile_corpus з локального корпусу (JSON з версією формату)
+LETTER_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ua_letter_profile.json')
+LETTER_PROFILE_VERSION = 1
+
+
+def load_letter_profile(path=LETTER_PROFILE_PATH):
+    """Частоти літер (%) з профілю корпусу або None, якщо профілю немає чи він несумісний."""
+    try:
+        with open(path, 'r', encoding='utf-8') as src:
+            profile = json.load(src)
+    except (OSError, ValueError):
+        return None
+    if profile.get('version') != LETTER_PROFILE_VERSION or profile.get('alphabet') != ALPHABET_UA:
+        return None
+    return {char: float(profile['frequencies'][char]) for char in ALPHABET_UA}
+
+
+UA_FREQ_EXPECTED = load_letter_profile() or UA_FREQ_DEFAULT
+EXPECTED_FREQ_VECTOR = np.array([UA_FREQ_EXPECTED.get(ALPHABET_UA[i], 0.0) / 100 for i in range(ALPHABET_LEN)])
+
+
+# --- 2. ЛОГІКА ШИФРУВАННЯ ---
+
+def generate_caesar_key(date_str):
+    total_sum = 0
+    for char in date_str:
+        if char.isdigit():
+            total_sum += int(char)
+    return total_sum % ALPHABET_LEN
+
+
+def generate_vigenere_key(surname):
+    key = "".join(filter(lambda x: x.isalpha(), surname)).upper()
+    return key if key else "КРИПТО"
+
+
+# Таблиці для векторного шифрування за кодами символів (UTF-32):
+# _SHIFT_LUT[s][код] — код символу після зсуву на s; не-літери лишаються як є
+_UPPER_CODES = np.array([ord(c) for c in ALPHABET_UA], dtype=np.uint32)
+_LOWER_CODES = np.array([ord(c) for c in ALPHABET_UA_LOWER], dtype=np.uint32)
+_CODE_LUT_SIZE = int(max(_UPPER_CODES.max(), _LOWER_CODES.max())) + 1
+_LETTER_INDEX = np.full(_CODE_LUT_SIZE, -1, dtype=np.int64)
+_LETTER_INDEX[_UPPER_CODES] = np.arange(ALPHABET_LEN)
+_LETTER_INDEX[_LOWER_CODES] = np.arange(ALPHABET_LEN)
+_UPPER_INDEX = np.full(_CODE_LUT_SIZE, -1, dtype=np.int64)  # лише великі, як ALPHABET_UA.find
+_UPPER_INDEX[_UPPER_CODES] = np.arange(ALPHABET_LEN)
+_SHIFT_LUT = np.tile(np.arange(_CODE_LUT_SIZE, dtype=np.uint32), (ALPHABET_LEN, 1))
+for _s in range(ALPHABET_LEN):
+    _SHIFT_LUT[_s, _UPPER_CODES] = np.roll(_UPPER_CODES, -_s)
+    _SHIFT_LUT[_s, _LOWER_CODES] = np.roll(_LOWER_CODES, -_s)
+
+
+def text_to_codes(text):
+    return np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+
+
+def codes_to_text(codes):
+    return codes.astype('<u4').tobytes().decode('utf-32-le', 'surrogatepass')
+
+
+def _lookup(table, codes):
+    # Символи поза таблицею (не кирилиця) — не літери
+    result = np.full(codes.shape, -1, dtype=np.int64)
+    inside = codes < _CODE_LUT_SIZE
+    result[inside] = table[codes[inside]]
+    return result
+
+
+def _caesar_vectorized(text, shift):
+    codes = text_to_codes(text)
+    result = codes.copy()
+    inside = codes < _CODE_LUT_SIZE
+    result[inside] = _SHIFT_LUT[shift % ALPHABET_LEN][codes[inside]]
+    return codes_to_text(result)
+
+
+def _vigenere_vectorized(text, key_stream, mode, offset=0):
+    # Повертає (результат, кількість літер у тексті)
+    codes = text_to_codes(text)
+    letters = _lookup(_LETTER_INDEX, codes) >= 0
+    letter_count = int(letters.sum())
+    if letter_count == 0:
+        return text, 0
+
+    # n-та літера тексту бере зсув із (offset + n)-го символу key_stream (циклічно);
+    # символ не з ALPHABET_UA дає зсув -1, як ALPHABET_UA.find()
+    key_shifts = _lookup(_UPPER_INDEX, text_to_codes(key_stream))
+    shifts = key_shifts[(offset + np.arange(letter_count)) % len(key_shifts)]
+    if mode == 'decrypt':
+        shifts = -shifts
+
+    result = codes.copy()
+    result[letters] = _SHIFT_LUT[shifts % ALPHABET_LEN, codes[letters]]
+    return codes_to_text(result), letter_count
+
+
+def process_text(text, shift, cipher_type='caesar', mode='encrypt', key_stream=None):
+    # Текст перетворюється на масив кодів один раз, зсуви — векторна арифметика mod 33
+    if cipher_type == 'vigenere' and key_stream:
+        return _vigenere_vectorized(text, key_stream, mode)[0]
+    return _caesar_vectorized(text, shift)
+
+
+def vigenere_key_stream(plaintext, key):
+    key_stream = ""
+    key_index = 0
+    key_upper = key.upper()
+    for char in plaintext:
+        if char in ALPHABET_UA or char in ALPHABET_UA_LOWER:
+            key_stream += key_upper[key_index % len(key_upper)]
+            key_index += 1
+        else:
+            key_stream += char
+    return key_stream
+
+
+def caesar_decrypt(ciphertext, shift):
+    return process_text(ciphertext, -shift, cipher_type='caesar', mode='decrypt')
+
+
+def vigenere_process(text, key, mode='encrypt', key_index=0):
+    """Шифр Віженера без проміжного потоку ключа.
+
+    Ключ просувається лише на літерах; key_index — позиція в ключі на початку
+    тексту. Повертає (результат, key_index для наступного фрагмента), тож текст
+    можна обробляти частинами з тим самим результатом, що й цілим.
+    """
+    key_upper = key.upper()
+    if not key_upper:
+        return text, key_index
+    result, letter_count = _vigenere_vectorized(text, key_upper, mode, key_index)
+    return result, (key_index + letter_count) % len(key_upper)
+
+
+def process_file(input_path, output_path, cipher_type='caesar', mode='encrypt', shift=0, key=None,
+                 chunk_size=1 << 20, encoding='utf-8'):
+    """Потокове шифрування файлу у файл частинами по chunk_size символів.
+
+    Пам'ять не залежить від розміру файлу; для Віженера позиція в ключі
+    переноситься між частинами. cipher_type='substitution' бере key як
+    перестановку алфавіту. Повертає кількість байтів, час і МБ/с.
+    """
+    key_index = 0
+    start = time.perf_counter()
+    with open(input_path, 'r', encoding=encoding, newline='') as src, \
+            open(output_path, 'w', encoding=encoding, newline='') as dst:
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            if cipher_type == 'vigenere':
+                chunk, key_index = vigenere_process(chunk, key, mode, key_index)
+            elif cipher_type == 'substitution':
+                chunk = substitution_process(chunk, key, mode)
+            else:
+                chunk = process_text(chunk, shift if mode == 'encrypt' else -shift)
+            dst.write(chunk)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(input_path)
+    return {'bytes': size, 'seconds': elapsed, 'mb_per_s': size / elapsed / 1e6 if elapsed > 0 else 0.0}
+
+
+# --- 3. ФУНКЦІЇ КРИПТОАНАЛІЗУ ---
+
+def get_frequency_count(text):
+    letter_counts = np.bincount(letter_indices(text), minlength=ALPHABET_LEN)
+    counts = dict(zip(ALPHABET_UA, letter_counts.tolist()))
+    return counts, int(letter_counts.sum())
+
+
+def get_frequency_perc(text):
+    counts, total_letters = get_frequency_count(text)
+    if total_letters == 0:
+        return {char: 0 for char in ALPHABET_UA}
+
+    frequencies = {char: (count / total_letters * 100) for char, count in counts.items()}
+    return frequencies
+
+
+def analyze_caesar_frequency(ciphertext, model=None):
+    cipher_freq = get_frequency_perc(ciphertext)
+
+    if not cipher_freq or max(cipher_freq.values()) == 0:
+        return "Недостатньо літер для частотного аналізу.", 0
+
+    most_common_cipher = max(cipher_freq, key=cipher_freq.get)
+
+    idx_cipher = ALPHABET_UA.find(most_common_cipher)
+    idx_expected = ALPHABET_UA.find('А')
+
+    guessed_shift = (idx_cipher - idx_expected) % ALPHABET_LEN
+
+    output = "--- ЧАСТОТНИЙ АНАЛІЗ (ШИФР ЦЕЗАРЯ) ---\n"
+    output += f"1. Найчастіша літера в шифротексті: '{most_common_cipher}' ({cipher_freq[most_common_cipher]:.2f}%)\n"
+    output += f"2. Очікувана найчастіша літера (гіпотеза): 'А'\n"
+    output += f"3. Обчислений зсув: ({idx_cipher} - {idx_expected}) mod {ALPHABET_LEN} = {guessed_shift}\n"
+
+    # Гіпотеза за однією літерою легко помиляється на коротких текстах:
+    # уточнюємо зсув за χ² усієї гістограми
+    best_shift, _, _, confidence = rank_caesar_shifts(ciphertext, model)[0]
+    output += f"4. Зсув за χ² усієї гістограми: {best_shift} (впевненість {confidence * 100:.2f}%)\n"
+    guessed_shift = best_shift
+
+    decrypted_text = caesar_decrypt(ciphertext[:100], guessed_shift)
+    output += "\n--- ЙМОВІРНЕ РОЗШИФРУВАННЯ (за χ²) ---\n"
+    output += decrypted_text + "..."
+
+    return output, guessed_shift
+
+
+def calculate_ic(text):
+    counts, total_letters = get_frequency_count(text)
+
+    if total_letters < 2:
+        return 0.0
+
+    sum_ni_ni_minus_1 = sum(count * (count - 1) for count in counts.values())
+    ic = sum_ni_ni_minus_1 / (total_letters * (total_letters - 1))
+    return ic
+
+
+def letter_indices(text):
+    """Номери літер тексту (0..32) без інших символів, регістр не враховується."""
+    indices = _lookup(_LETTER_INDEX, text_to_codes(text))
+    return indices[indices >= 0]
+
+
+def ngram_codes(indices, length):
+    """Коди всіх n-грам послідовності індексів: Σ idx[k] · 33^(n-1-k)."""
+    count = len(indices) - length + 1
+    codes = np.zeros(max(count, 0), dtype=np.int64)
+    for k in range(length):
+        codes = codes * ALPHABET_LEN + indices[k:k + count]
+    return codes
+
+
+def repeated_ngram_distances(indices, length):
+    """Відстані між сусідніми входженнями кожної повторюваної n-грами.
+
+    n-грама кодується точним поліноміальним (ковзним) кодом за основою 33,
+    повтори знаходяться сортуванням кодів — пам'ять O(n) без словника позицій.
+    Повертає (коди, позиції, відстані) для пар сусідніх входжень.
+    """
+    if len(indices) - length + 1 < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    codes = ngram_codes(indices, length)
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    same = sorted_codes[1:] == sorted_codes[:-1]
+    return sorted_codes[1:][same], order[:-1][same], order[1:][same] - order[:-1][same]
+
+
+def _decode_ngram(code, length):
+    letters = []
+    for _ in range(length):
+        code, idx = divmod(int(code), ALPHABET_LEN)
+        letters.append(ALPHABET_UA[idx])
+    return "".join(reversed(letters))
+
+
+def kasiski_test(ciphertext, max_key_len=10, top_sequences=15):
+    indices = letter_indices(ciphertext)
+
+    distances = []
+    sequences = []
+    for length in range(3, 6):
+        codes, positions, dists = repeated_ngram_distances(indices, length)
+        distances.append(dists)
+        if len(codes):
+            uniq, first, counts = np.unique(codes, return_index=True, return_counts=True)
+            for k in np.argsort(-counts, kind='stable')[:top_sequences]:
+                sequences.append((int(counts[k]) + 1, length, _decode_ngram(uniq[k], length),
+                                  int(positions[first[k]]), int(dists[first[k]])))
+    all_distances = np.concatenate(distances)
+
+    if len(all_distances) == 0:
+        return "Не знайдено повторюваних послідовностей для аналізу Касіскі. Спробуйте довший текст.", []
+
+    output = "--- МЕТОД КАСІСКІ: ПОШУК ПОВТОРЕНЬ ---\n"
+    output += f"Повторюваних пар (3-5 літер): {len(all_distances)}. Найчастіші послідовності:\n"
+    sequences.sort(key=lambda item: (-item[0] * item[1], item[3]))
+    for occurrences, _, seq, position, distance in sequences[:top_sequences]:
+        output += f"Послідовність '{seq}': входжень {occurrences}, перша позиція {position}, відстань {distance}\n"
+
+    # Гістограма дільників відстаней: справжня довжина ключа ділить більшість
+    # відстаней; надлишок над випадковим рівнем (N / L) відсікає дрібні дільники
+    total = len(all_distances)
+    rows = []
+    for key_len in range(2, max_key_len + 1):
+        hits = int(np.count_nonzero(all_distances % key_len == 0))
+        rows.append((key_len, hits, hits - total / key_len))
+    ranked = sorted(rows, key=lambda row: (-row[2], row[0]))
+
+    output += f"\n--- ВИЗНАЧЕННЯ ДОВЖИНИ КЛЮЧА (ГІСТОГРАМА ДІЛЬНИКІВ ВІДСТАНЕЙ) ---\n"
+    output += tabulate([[key_len, hits, f"{hits / total * 100:.1f}%", f"{excess:.1f}"]
+                        for key_len, hits, excess in ranked],
+                       headers=["Довжина ключа (L)", "Відстаней кратних L", "Частка", "Надлишок"],
+                       tablefmt="fancy_grid")
+
+    possible_lengths = [key_len for key_len, _, excess in ranked if excess > 0]
+    if possible_lengths:
+        output += f"\nЙмовірні довжини ключа (за спаданням): {possible_lengths}\n"
+    else:
+        output += "\nЖодна довжина не виділяється над випадковим рівнем.\n"
+
+    return output, possible_lengths
+
+
+def column_counts(indices, length):
+    """Матриця частот (length x 33): рядок i — літери на позиціях i, i+L, i+2L..."""
+    columns = np.arange(len(indices)) % length
+    counts = np.bincount(columns * ALPHABET_LEN + indices, minlength=length * ALPHABET_LEN)
+    return counts.reshape(length, ALPHABET_LEN)
+
+
+def column_ics(indices, length):
+    counts = column_counts(indices, length)
+    totals = counts.sum(axis=1)
+    pairs = (counts * (counts - 1)).sum(axis=1)
+    denominators = totals * (totals - 1)
+    return np.where(totals >= 2, pairs / np.maximum(denominators, 1), 0.0)
+
+
+def friedman_estimate(indices, ic_expected=0.057):
+    """Оцінка довжини ключа за тестом Фрідмана з IC усього тексту."""
+    total = len(indices)
+    if total < 2:
+        return 0.0
+    ic_observed = float(column_ics(indices, 1)[0])
+    ic_random = 1.0 / ALPHABET_LEN
+    denominator = (total - 1) * ic_observed - total * ic_random + ic_expected
+    if denominator <= 0:
+        return float('inf')
+    return (ic_expected - ic_random) * total / denominator
+
+
+def vigenere_index_of_coincidence_test(ciphertext, max_len=10):
+    indices = letter_indices(ciphertext)
+
+    ics = {}
+    IC_UA_EXPECTED = 0.057
+
+    # Індекси літер обчислюються один раз; для кожної L — одна bincount по (стовпець, літера)
+    for length in range(1, max_len + 1):
+        ics[length] = sum(column_ics(indices, length).tolist()) / length
+
+    output = "--- ІНДЕКС ЗБІГУ (IC) ДЛЯ ВИЗНАЧЕННЯ ДОВЖИНИ КЛЮЧА ---\n"
+
+    ic_data = []
+    best_length = 1
+    min_diff = float('inf')
+
+    for length, ic_val in ics.items():
+        ic_data.append([length, f"{ic_val:.4f}"])
+        diff = abs(ic_val - IC_UA_EXPECTED)
+        if diff < min_diff:
+            min_diff = diff
+            best_length = length
+
+    output += tabulate(ic_data, headers=["Довжина ключа (L)", "Середній IC"], tablefmt="fancy_grid")
+    output += f"\nГіпотеза: Найкраща довжина ключа (IC найближчий до {IC_UA_EXPECTED:.4f}): {best_length}"
+    friedman = friedman_estimate(indices, IC_UA_EXPECTED)
+    output += f"\nТест Фрідмана: оцінка довжини ключа ≈ {friedman:.2f}"
+
+    return output, ics
+
+
+# _EXPECTED_BY_SHIFT[s][c] — очікувана частка шифролітери c, якщо стовпець зсунуто на s
+# (нульові частоти підняті до мінімуму, щоб χ² не ділив на нуль)
+_CHI_FLOOR = 1e-3
+_EXPECTED_BY_SHIFT = np.array([np.roll(np.maximum(EXPECTED_FREQ_VECTOR, _CHI_FLOOR), s)
+                               for s in range(ALPHABET_LEN)])
+_INV_EXPECTED_BY_SHIFT = 1.0 / _EXPECTED_BY_SHIFT
+
+
+def shift_chi_squared(counts):
+    """χ² для всіх 33 зсувів кожного рядка частот (k x 33) однією матричною операцією.
+
+    Σ (c - nE)² / (nE) = Σ c² / (nE) - n, оскільки Σ c = n і Σ E ≈ 1.
+    """
+    counts = np.atleast_2d(counts).astype(np.float64)
+    totals = counts.sum(axis=1, keepdims=True)
+    safe_totals = np.maximum(totals, 1.0)
+    return (counts ** 2) @ _INV_EXPECTED_BY_SHIFT.T / safe_totals - totals
+
+
+def _minimal_period(key):
+    for period in range(1, len(key)):
+        if len(key) % period == 0 and key == key[:period] * (len(key) // period):
+            return key[:period]
+    return key
+
+
+def _polish_key(sample, shifts, model, sweeps=2):
+    # Покоординатне уточнення ключа за n-грамним fitness: кожна позиція — найкращий із 33 зсувів
+    shifts = list(shifts)
+    best = ngram_fitness(decrypt_indices(sample, shifts), model)
+    for _ in range(sweeps):
+        improved = False
+        for pos in range(len(shifts)):
+            for shift in range(ALPHABET_LEN):
+                if shift == shifts[pos]:
+                    continue
+                trial = shifts[:pos] + [shift] + shifts[pos + 1:]
+                fitness = ngram_fitness(decrypt_indices(sample, trial), model)
+                if fitness > best:
+                    best, shifts, improved = fitness, trial, True
+        if not improved:
+            break
+    return shifts
+
+
+def recover_vigenere_key(ciphertext, max_len=20, top=5, preview_len=60, model=None, polish=3,
+                         sample_len=2000):
+    """Автоматичне відновлення ключа Віженера.
+
+    Для кожної довжини L найкращий зсув кожного стовпця обирається за χ².
+    Довжини, чий середній IC стовпців ближчий до мовного, ніж до випадкового,
+    йдуть першими від найкоротшої (кратні L теж мають високий IC, але лише
+    підганяють шум); решта — за χ² на літеру розшифрованого тексту, що
+    рахується з повернутих гістограм без розшифрування. З n-грамною моделлю
+    (model) ключі перших polish кандидатів уточнюються за нею, і всі
+    кандидати ранжуються за fitness перших sample_len літер розшифрування.
+    Повертає (output, candidates).
+    """
+    indices = letter_indices(ciphertext)
+    total = len(indices)
+    if total < 2:
+        return "Недостатньо літер для відновлення ключа.", []
+
+    IC_UA_EXPECTED = 0.057
+    ic_threshold = (IC_UA_EXPECTED + 1.0 / ALPHABET_LEN) / 2
+    expected = np.maximum(EXPECTED_FREQ_VECTOR, _CHI_FLOOR)
+    alphabet = np.arange(ALPHABET_LEN)
+    candidates = {}
+    for length in range(1, min(max_len, total) + 1):
+        counts = column_counts(indices, length)
+        shifts = shift_chi_squared(counts).argmin(axis=1)
+        # Гістограма відкритого тексту: plain[j] = Σ_i counts[i, (j + s_i) mod 33]
+        rotated = (alphabet[None, :] + shifts[:, None]) % ALPHABET_LEN
+        plain = counts[np.arange(length)[:, None], rotated].sum(axis=0)
+        score = float(((plain - total * expected) ** 2 / (total * expected)).sum()) / total
+        ic = float(column_ics(indices, length).mean())
+        key = _minimal_period("".join(ALPHABET_UA[s] for s in shifts))
+        if key not in candidates:
+            candidates[key] = {'length': len(key), 'key': key, 'score': score, 'ic': ic,
+                               'language_like': ic >= ic_threshold}
+
+    ranked = sorted(candidates.values(),
+                    key=lambda c: (not c['language_like'], c['length'] if c['language_like'] else 0, c['score']))
+    if model is not None:
+        sample = indices[:sample_len]
+        polished = {}
+        for position, candidate in enumerate(ranked):
+            shifts = [ALPHABET_UA.index(ch) for ch in candidate['key']]
+            if position < polish:
+                shifts = _polish_key(sample, shifts, model)
+                candidate = dict(candidate, key=_minimal_period("".join(ALPHABET_UA[s] for s in shifts)))
+                candidate['length'] = len(candidate['key'])
+                shifts = shifts[:candidate['length']]
+            if candidate['key'] not in polished:
+                candidate['fitness'] = ngram_fitness(decrypt_indices(sample, shifts), model)
+                polished[candidate['key']] = candidate
+        ranked = sorted(polished.values(), key=lambda c: (-c['fitness'], c['length']))
+    ranked = ranked[:top]
+
+    output = "--- АВТОМАТИЧНЕ ВІДНОВЛЕННЯ КЛЮЧА (χ² ПО СТОВПЦЯХ) ---\n"
+    rows = []
+    for rank, candidate in enumerate(ranked, 1):
+        preview, _ = vigenere_process(ciphertext[:preview_len], candidate['key'], 'decrypt')
+        rows.append([rank, candidate['length'], candidate['key'], f"{candidate['ic']:.4f}",
+                     f"{candidate['score']:.4f}"]
+                    + ([f"{candidate['fitness']:.1f}"] if model is not None else [])
+                    + [preview.replace("\n", " ") + "..."])
+    headers = ["#", "L", "Ключ", "IC стовпців", "χ² на літеру"] + (["n-грамний fitness"] if model is not None else [])
+    output += tabulate(rows, headers=headers + ["Початок розшифрування"], tablefmt="fancy_grid")
+    output += f"\nНайімовірніший ключ: '{ranked[0]['key']}' (довжина {ranked[0]['length']})"
+
+    return output, ranked
+
+
+_LOG_EXPECTED_BY_SHIFT = np.log(_EXPECTED_BY_SHIFT)
+
+
+def rank_caesar_shifts(ciphertext, model=None, rerank=5):
+    """Оцінює всі 33 зсуви з однієї гістограми шифротексту: O(n + 33²).
+
+    Повертає список (зсув, χ², логправдоподібність, впевненість) за зростанням χ².
+    Впевненість — відносна вага exp(-Δχ²/2), нормована на всі зсуви.
+    З n-грамною моделлю перші rerank зсувів переупорядковуються за її fitness.
+    """
+    indices = letter_indices(ciphertext)
+    counts = np.bincount(indices, minlength=ALPHABET_LEN)
+    chi2 = shift_chi_squared(counts)[0]
+    log_likelihood = _LOG_EXPECTED_BY_SHIFT @ counts
+    weights = np.exp(-(chi2 - chi2.min()) / 2)
+    confidence = weights / weights.sum()
+    order = np.lexsort((-log_likelihood, chi2))
+    if model is not None:
+        head = sorted(order[:rerank], key=lambda shift: -ngram_fitness(decrypt_indices(indices, shift), model))
+        order = np.concatenate((head, order[rerank:]))
+    return [(int(shift), float(chi2[shift]), float(log_likelihood[shift]), float(confidence[shift]))
+            for shift in order]
+
+
+def caesar_brute_force(ciphertext, correct_shift=None, top_k=10, preview_len=35, model=None):
+    ranking = rank_caesar_shifts(ciphertext, model)
+    # correct_shift=None — ключ невідомий (пакетний аналіз), позначки немає
+    correct = None if correct_shift is None else correct_shift % ALPHABET_LEN
+
+    # Розшифровується лише початок тексту і лише для показаних зсувів
+    shown = ranking[:top_k]
+    if correct is not None and all(shift != correct for shift, *_ in shown):
+        shown = shown + [None] + [row for row in ranking if row[0] == correct]
+
+    display_results = []
+    for rank_row in shown:
+        if rank_row is None:
+            display_results.append(["...", "...", "...", "...", "..."])
+            continue
+        shift, chi2, _, confidence = rank_row
+        display_results.append([
+            ranking.index(rank_row) + 1,
+            shift or ALPHABET_LEN,
+            f"{confidence * 100:.2f}%",
+            f"{chi2:.1f}",
+            f"{caesar_decrypt(ciphertext[:preview_len], shift)}..." + (" <--- ПРАВИЛЬНИЙ КЛЮЧ" if shift == correct else ""),
+        ])
+
+    output = "--- BRUTE FORCE АТАКА (ПОВНИЙ ПЕРЕБІР) ---\n"
+    output += f"ВСЬОГО СПРОБ: {ALPHABET_LEN}\n"
+
+    output += tabulate(display_results, headers=["Ранг", "Зсув", "Впевненість", "χ²", "Частина розшифрованого тексту"],
+                       tablefmt="fancy_grid")
+    output += (f"\n\nПРИМІТКА: Усі {ALPHABET_LEN} зсуви оцінено за однією гістограмою літер (χ² та логправдоподібність);"
+               f" відображено {top_k} найімовірніших та правильний.")
+    return output
+
+
+# --- 3.1 N-ГРАМНА МОДЕЛЬ МОВИ ---
+#
+# Таблиця log10-ймовірностей n-грам форми (33,)*n у .npy; завантажується через
+# mmap, тож велика таблиця квадрограм (1.2 млн значень) не читається цілком.
+
+NGRAM_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ua_quadgrams.npy')
+
+
+def _iter_corpus_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith('.txt'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def _corpus_segments(paths, segment_size, encoding):
+    # Великі UTF-8 файли ділимо на байтові діапазони, щоб один файл обробляли кілька процесів
+    for path in _iter_corpus_files(paths):
+        size = os.path.getsize(path)
+        if encoding.replace('-', '').lower() != 'utf8':
+            yield path, 0, None
+            continue
+        for start in range(0, size, segment_size):
+            yield path, start, min(start + segment_size, size)
+
+
+def _is_continuation(byte):
+    return byte & 0xC0 == 0x80
+
+
+def _read_segment(path, start, end, chunk_size, encoding):
+    """Текст байтового діапазону [start, end) частинами.
+
+    Діапазону належать символи, чий перший байт лежить у ньому: продовження
+    символу з попереднього діапазону пропускаються, останній символ дочитується.
+    end=None — увесь файл у довільному кодуванні.
+    """
+    if end is None:
+        with open(path, 'r', encoding=encoding, errors='replace') as src:
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    with open(path, 'rb') as src:
+        src.seek(start)
+        if start > 0:
+            head = src.read(3)
+            skip = 0
+            while skip < len(head) and _is_continuation(head[skip]):
+                skip += 1
+            src.seek(start + skip)
+        position = src.tell()
+        while position < end:
+            raw = src.read(min(chunk_size, end - position))
+            if not raw:
+                break
+            position += len(raw)
+            if position >= end:
+                tail = src.read(3)
+                extra = 0
+                while extra < len(tail) and _is_continuation(tail[extra]):
+                    extra += 1
+                raw += tail[:extra]
+            yield decoder.decode(raw, final=position >= end)
+
+
+def _count_segment(path, start, end, n, chunk_size, encoding):
+    letters = np.zeros(ALPHABET_LEN, dtype=np.int64)
+    ngrams = np.zeros(ALPHABET_LEN ** n, dtype=np.int64) if n else None
+    tail = np.zeros(0, dtype=np.int64)
+    for chunk in _read_segment(path, start, end, chunk_size, encoding):
+        indices = letter_indices(chunk)
+        letters += np.bincount(indices, minlength=ALPHABET_LEN)
+        if n:
+            # Хвіст з n-1 літер переноситься між частинами одного діапазону
+            indices = np.concatenate((tail, indices))
+            ngrams += np.bincount(ngram_codes(indices, n), minlength=ngrams.size)
+            tail = indices[len(indices) - (n - 1):] if len(indices) >= n - 1 else indices
+    return letters, ngrams
+
+
+def count_corpus(corpus_paths, n=0, workers=None, segment_size=64 << 20, chunk_size=1 << 20, encoding='utf-8'):
+    """Потоковий підрахунок літер (і n-грам, якщо n > 0) у корпусі.
+
+    Файли (і частини великих файлів по segment_size байтів) рахуються у пулі
+    процесів (workers=0 — у цьому ж процесі), часткові лічильники додаються.
+    n-грами на межах частин файлу не враховуються. Повертає (літери, n-грами, статистика).
+    """
+    if isinstance(corpus_paths, str):
+        corpus_paths = [corpus_paths]
+    tasks = list(_corpus_segments(corpus_paths, segment_size, encoding))
+    start = time.perf_counter()
+    letters = np.zeros(ALPHABET_LEN, dtype=np.int64)
+    ngrams = np.zeros(ALPHABET_LEN ** n, dtype=np.int64) if n else None
+    columns = list(zip(*tasks)) if tasks else [(), (), ()]
+    arguments = (*columns, [n] * len(tasks), [chunk_size] * len(tasks), [encoding] * len(tasks))
+    if workers == 0:
+        results = map(_count_segment, *arguments)
+        pool = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_count_segment, *arguments)
+    try:
+        for part_letters, part_ngrams in results:
+            letters += part_letters
+            if n:
+                ngrams += part_ngrams
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+    files = len({path for path, _, _ in tasks})
+    size = sum(os.path.getsize(path) for path in {path for path, _, _ in tasks})
+    stats = {'files': files, 'bytes': size, 'seconds': elapsed,
+             'mb_per_s': size / elapsed / 1e6 if elapsed > 0 else 0.0}
+    return letters, ngrams, stats
+
+
+def _ngram_log_probs(counts, n, smoothing):
+    total = counts.sum()
+    if total == 0:
+        raise ValueError("Корпус не містить жодної n-грами з літер алфавіту")
+    return np.log10(np.maximum(counts, smoothing) / total).astype(np.float32).reshape((ALPHABET_LEN,) * n)
+
+
+def build_ngram_model(corpus_paths, n=4, output_path=None, chunk_size=1 << 20, encoding='utf-8',
+                      smoothing=0.01, workers=None):
+    """Будує таблицю log10-ймовірностей n-грам з локального корпусу.
+
+    corpus_paths — файли або каталоги (*.txt). Рахуються n-грами з літер,
+    інші символи пропускаються (див. count_corpus). Небачені n-грами
+    отримують smoothing / total.
+    """
+    _, counts, _ = count_corpus(corpus_paths, n, workers, chunk_size=chunk_size, encoding=encoding)
+    model = _ngram_log_probs(counts, n, smoothing)
+    if output_path:
+        np.save(output_path, model)
+    return model
+
+
+def profile_corpus(corpus_paths, output_path=LETTER_PROFILE_PATH, n=0, ngram_output=None, workers=None,
+                   encoding='utf-8', smoothing=0.01):
+    """Профіль частот літер корпусу у форматі, який завантажує load_letter_profile.
+
+    З n > 0 за той самий прохід будується і n-грамна модель (ngram_output,
+    типово NGRAM_MODEL_PATH). Повертає профіль і статистику проходу.
+    """
+    letters, ngrams, stats = count_corpus(corpus_paths, n, workers, encoding=encoding)
+    total = int(letters.sum())
+    if total == 0:
+        raise ValueError("Корпус не містить жодної літери алфавіту")
+    profile = {
+        'version': LETTER_PROFILE_VERSION,
+        'alphabet': ALPHABET_UA,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'files': stats['files'],
+        'bytes': stats['bytes'],
+        'letters': total,
+        'counts': dict(zip(ALPHABET_UA, letters.tolist())),
+        'frequencies': {char: count / total * 100 for char, count in zip(ALPHABET_UA, letters.tolist())},
+    }
+    with open(output_path, 'w', encoding='utf-8') as dst:
+        json.dump(profile, dst, ensure_ascii=False, indent=1)
+    if n:
+        np.save(ngram_output or NGRAM_MODEL_PATH, _ngram_log_probs(ngrams, n, smoothing))
+    return profile, stats
+
+
+def load_ngram_model(path=NGRAM_MODEL_PATH):
+    return np.load(path, mmap_mode='r')
+
+
+@lru_cache(maxsize=None)
+def default_ngram_model():
+    """Модель поруч зі скриптом (ua_quadgrams.npy) або None, якщо її не побудовано."""
+    return load_ngram_model() if os.path.exists(NGRAM_MODEL_PATH) else None
+
+
+def ngram_fitness(indices, model):
+    """Сумарна log10-ймовірність тексту (масиву індексів літер) за n-грамною моделлю."""
+    n = model.ndim
+    if len(indices) < n:
+        return 0.0
+    return float(model.reshape(-1)[ngram_codes(indices, n)].sum(dtype=np.float64))
+
+
+def decrypt_indices(indices, key_shifts):
+    """Розшифрування масиву індексів літер циклічним ключем зсувів (Цезар — один зсув)."""
+    key_shifts = np.atleast_1d(np.asarray(key_shifts, dtype=np.int64))
+    return (indices - np.resize(key_shifts, len(indices))) % ALPHABET_LEN
+
+
+# --- 3.2 ЗАГАЛЬНА ПІДСТАНОВКА (ВІДПАЛ ЗА N-ГРАМАМИ) ---
+#
+# Ключ — перестановка з 33 літер: ALPHABET_UA[i] шифрується як key[i].
+# Розв'язувач шукає відображення шифролітера -> літера відкритого тексту;
+# обмін двох літер перераховує лише n-грами, що містять їх.
+
+def _substitution_lut(source, target):
+    lut = np.arange(_CODE_LUT_SIZE, dtype=np.uint32)
+    lut[[ord(c) for c in source]] = [ord(c) for c in target]
+    lut[[ord(c) for c in source.lower()]] = [ord(c) for c in target.lower()]
+    return lut
+
+
+def substitution_process(text, key, mode='encrypt'):
+    key = key.upper()
+    if sorted(key) != sorted(ALPHABET_UA):
+        raise ValueError("Ключ підстановки має бути перестановкою всіх 33 літер алфавіту")
+    lut = _substitution_lut(ALPHABET_UA, key) if mode == 'encrypt' else _substitution_lut(key, ALPHABET_UA)
+    codes = text_to_codes(text)
+    result = codes.copy()
+    inside = codes < _CODE_LUT_SIZE
+    result[inside] = lut[codes[inside]]
+    return codes_to_text(result)
+
+
+def random_substitution_key(rng=random):
+    letters = list(ALPHABET_UA)
+    rng.shuffle(letters)
+    return "".join(letters)
+
+
+def _ngram_stats(indices, n):
+    # Унікальні n-грами шифротексту (по літерах), їх кількості та рядки з кожною літерою
+    codes, counts = np.unique(ngram_codes(indices, n), return_counts=True)
+    letters = np.stack([(codes // ALPHABET_LEN ** (n - 1 - k)) % ALPHABET_LEN for k in range(n)], axis=1)
+    rows_with = [np.flatnonzero((letters == c).any(axis=1)) for c in range(ALPHABET_LEN)]
+    return letters, counts.astype(np.float64), rows_with
+
+
+_WORKER_MODEL = None
+
+
+def _init_substitution_worker(model_path):
+    global _WORKER_MODEL
+    # Копія в пам'ять: випадкові звертання до mmap у гарячому циклі повільніші
+    _WORKER_MODEL = np.array(load_ngram_model(model_path))
+
+
+def _anneal(indices, seed, iterations, start_temp, model=None):
+    """Один запуск відпалу. Повертає (fitness, відображення, ітерації, секунди, час до найкращого)."""
+    model = _WORKER_MODEL if model is None else model
+    n = model.ndim
+    table = model.reshape(-1)
+    letters, counts, rows_with = _ngram_stats(indices, n)
+    powers = ALPHABET_LEN ** np.arange(n - 1, -1, -1)
+    rng = np.random.default_rng(seed)
+
+    # Старт: частотне зіставлення з випадковими обмінами для різноманіття запусків
+    cipher_order = np.argsort(-np.bincount(indices, minlength=ALPHABET_LEN), kind='stable')
+    plain_order = np.argsort(-EXPECTED_FREQ_VECTOR, kind='stable')
+    mapping = np.empty(ALPHABET_LEN, dtype=np.int64)
+    mapping[cipher_order] = plain_order
+    for _ in range(seed % 7 * 3):
+        a, b = rng.integers(ALPHABET_LEN, size=2)
+        mapping[[a, b]] = mapping[[b, a]]
+
+    plain_codes = mapping[letters] @ powers
+    fitness = float(counts @ table[plain_codes])
+    best, best_mapping = fitness, mapping.copy()
+    start = time.perf_counter()
+    best_at = 0.0
+    pairs = rng.integers(ALPHABET_LEN, size=(iterations, 2))
+    thresholds = np.log(rng.random(iterations))
+
+    for step in range(iterations):
+        a, b = pairs[step]
+        if a == b:
+            continue
+        rows = np.union1d(rows_with[a], rows_with[b])
+        if len(rows) == 0:
+            continue
+        mapping[[a, b]] = mapping[[b, a]]
+        new_codes = mapping[letters[rows]] @ powers
+        delta = float(counts[rows] @ (table[new_codes] - table[plain_codes[rows]]))
+        temperature = start_temp * (1.0 - step / iterations)
+        if delta >= 0 or (temperature > 0 and thresholds[step] < delta / temperature):
+            plain_codes[rows] = new_codes
+            fitness += delta
+            if fitness > best:
+                best, best_mapping = fitness, mapping.copy()
+                best_at = time.perf_counter() - start
+        else:
+            mapping[[a, b]] = mapping[[b, a]]
+    return best, best_mapping, iterations, time.perf_counter() - start, best_at
+
+
+def solve_substitution(ciphertext, model_path=NGRAM_MODEL_PATH, restarts=8, iterations=20000,
+                       start_temp=None, workers=None, model=None):
+    """Розв'язує загальну моноалфавітну підстановку відпалом з перезапусками.
+
+    Перезапуски виконуються у пулі процесів (workers=0 — у цьому ж процесі,
+    з уже завантаженою model, якщо її передано), модель відкривається один
+    раз на воркер. Повертає ключ, відкритий текст,
+    fitness, ітерації/с та час до розв'язку.
+    """
+    indices = letter_indices(ciphertext)
+    if len(indices) < 2:
+        raise ValueError("Недостатньо літер для розв'язання підстановки")
+    if start_temp is None:
+        # Масштаб температури — типова зміна fitness від одного обміну
+        start_temp = max(1.0, len(indices) / 100)
+
+    start = time.perf_counter()
+    args = [(indices, seed, iterations, start_temp) for seed in range(restarts)]
+    if workers == 0:
+        if model is None:
+            _init_substitution_worker(model_path)
+            model = _WORKER_MODEL
+        results = [_anneal(*a, model=model) for a in args]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_substitution_worker,
+                                 initargs=(model_path,)) as pool:
+            results = list(pool.map(_anneal, *zip(*args)))
+    elapsed = time.perf_counter() - start
+
+    best, mapping, _, seconds, best_at = max(results, key=lambda r: r[0])
+    # mapping: шифролітера -> літера відкритого тексту; ключ шифрування — обернене
+    key = [""] * ALPHABET_LEN
+    for cipher_idx, plain_idx in enumerate(mapping):
+        key[plain_idx] = ALPHABET_UA[cipher_idx]
+    key = "".join(key)
+    total_iterations = sum(r[2] for r in results)
+    return {
+        'key': key,
+        'plaintext': substitution_process(ciphertext, key, 'decrypt'),
+        'fitness': best,
+        'restarts': restarts,
+        'iterations': total_iterations,
+        'iterations_per_sec': total_iterations / sum(r[3] for r in results) if results else 0.0,
+        'time_to_solution': best_at,
+        'seconds': elapsed,
+    }
+
+
+def benchmark_substitution(texts, model_path=NGRAM_MODEL_PATH, seed=0, **options):
+    """Шифрує кожен текст випадковим ключем і розв'язує; рахує частку правильних літер."""
+    rng = random.Random(seed)
+    rows = []
+    for text in texts:
+        key = random_substitution_key(rng)
+        result = solve_substitution(substitution_process(text, key), model_path, **options)
+        original = letter_indices(text)
+        recovered = letter_indices(result['plaintext'])
+        accuracy = float((original == recovered).mean()) if len(original) else 0.0
+        rows.append([len(original), f"{accuracy * 100:.1f}%", f"{result['iterations_per_sec']:.0f}",
+                     f"{result['time_to_solution']:.2f}", f"{result['seconds']:.2f}"])
+    return tabulate(rows, headers=["Літер", "Точність", "Ітерацій/с", "Час до розв'язку, с", "Усього, с"],
+                    tablefmt="fancy_grid")
+
+
+def _letter_window(text, letters, rng):
+    # Випадковий фрагмент тексту, що містить рівно letters літер (або весь текст, якщо він коротший)
+    positions = [i for i, char in enumerate(text) if char.upper() in ALPHABET_UA]
+    if len(positions) <= letters:
+        return text
+    first = rng.randrange(len(positions) - letters + 1)
+    return text[positions[first]:positions[first + letters - 1] + 1]
+
+
+def key_recovery_check(texts, trials=15, sample_letters=8000, caesar_letters=1500, seed=0):
+    """Регресійна перевірка криптоаналізу лише за χ² (без n-грамної моделі) на справжніх текстах.
+
+    Фрагменти по sample_letters літер шифруються випадковими ключами Віженера
+    довжиною 3..9; ключ має відновитися першим кандидатом recover_vigenere_key.
+    Фрагменти по caesar_letters літер шифруються кожним зсувом Цезаря; зсув має
+    бути першим у rank_caesar_shifts.
+    """
+    rng = random.Random(seed)
+    text = "\n".join(texts)
+    caesar_failures = []
+    for _ in range(trials):
+        sample = _letter_window(text, caesar_letters, rng)
+        for shift in range(ALPHABET_LEN):
+            recovered = rank_caesar_shifts(process_text(sample, shift))[0][0]
+            if recovered != shift:
+                caesar_failures.append({'shift': shift, 'recovered': recovered})
+    failures = []
+    for _ in range(trials):
+        sample = _letter_window(text, sample_letters, rng)
+        key = "".join(rng.choice(ALPHABET_UA) for _ in range(rng.randint(3, 9)))
+        candidates = recover_vigenere_key(vigenere_process(sample, key, 'encrypt')[0], model=None)[1]
+        recovered = candidates[0]['key'] if candidates else ""
+        if recovered != key:
+            failures.append({'key': key, 'recovered': recovered})
+    return {'caesar_trials': trials * ALPHABET_LEN, 'caesar_recovered': trials * ALPHABET_LEN - len(caesar_failures),
+            'caesar_failures': caesar_failures,
+            'vigenere_trials': trials, 'vigenere_recovered': trials - len(failures), 'failures': failures}
+
+
+# --- 3.3 ПАКЕТНИЙ КРИПТОАНАЛІЗ ---
+
+IC_LANGUAGE_THRESHOLD = (0.057 + 1.0 / ALPHABET_LEN) / 2
+CAESAR_CORRELATION_THRESHOLD = 0.6
+MIN_BATCH_LETTERS = 20
+_CENTERED_EXPECTED = EXPECTED_FREQ_VECTOR - EXPECTED_FREQ_VECTOR.mean()
+_CENTERED_EXPECTED_BY_SHIFT = np.array([np.roll(_CENTERED_EXPECTED, s) for s in range(ALPHABET_LEN)])
+
+
+def classify_ciphertext(ciphertext, max_len=20):
+    """Тип шифру за індексом збігу.
+
+    IC мовного рівня — моноалфавітний шифр: Цезар, якщо гістограма при
+    найкращому зсуві корелює з еталонними частотами (кореляція стійкіша за χ²
+    до літер з нульовою еталонною частотою), інакше загальна підстановка.
+    Низький IC — Віженер, якщо для якоїсь довжини ключа IC стовпців мовний,
+    інакше «other».
+    """
+    indices = letter_indices(ciphertext)
+    total = len(indices)
+    result = {'class': 'other', 'letters': total, 'ic': 0.0, 'key_length': None}
+    if total < MIN_BATCH_LETTERS:
+        return result
+    counts = np.bincount(indices, minlength=ALPHABET_LEN)
+    ic = float(column_ics(indices, 1)[0])
+    result['ic'] = ic
+    if ic >= IC_LANGUAGE_THRESHOLD:
+        centered = counts - counts.mean()
+        norm = np.linalg.norm(centered) * np.linalg.norm(_CENTERED_EXPECTED)
+        correlation = float((_CENTERED_EXPECTED_BY_SHIFT @ centered).max() / norm) if norm else 0.0
+        result['class'] = 'caesar' if correlation >= CAESAR_CORRELATION_THRESHOLD else 'substitution'
+        return result
+    for length in range(2, min(max_len, total // 2) + 1):
+        if float(column_ics(indices, length).mean()) >= IC_LANGUAGE_THRESHOLD:
+            result['class'] = 'vigenere'
+            result['key_length'] = length
+            break
+    return result
+
+
+def iter_ciphertexts(source, encoding='utf-8'):
+    """(id, шифротекст, помилка) з каталогу (*.txt, id — відносний шлях) або JSONL.
+
+    Рядок JSONL — об'єкт з полем ciphertext (або text) і необов'язковим id
+    (типово номер рядка). Некоректний рядок не зупиняє читання: для нього
+    шифротекст None, а помилка містить номер рядка (для коректних — None).
+    """
+    if os.path.isdir(source):
+        for path in _iter_corpus_files([source]):
+            with open(path, 'r', encoding=encoding, errors='replace') as src:
+                yield os.path.relpath(path, source), src.read(), None
+        return
+    with open(source, 'r', encoding=encoding, errors='replace') as src:
+        for line_no, line in enumerate(src, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                yield str(line_no), None, f"рядок {line_no}: некоректний JSON ({e})"
+                continue
+            if not isinstance(obj, dict):
+                yield str(line_no), None, f"рядок {line_no}: очікується JSON-об'єкт"
+                continue
+            ciphertext = obj.get('ciphertext', obj.get('text', ''))
+            item_id = str(obj.get('id', line_no))
+            if not isinstance(ciphertext, str):
+                yield item_id, None, f"рядок {line_no}: поле ciphertext має бути рядком"
+                continue
+            yield item_id, ciphertext, None
+
+
+class ItemTimeout(Exception):
+    pass
+
+
+_BATCH_OPTIONS = {}
+
+
+def _init_batch_worker(model_path, timeout, max_len):
+    global _WORKER_MODEL
+    _WORKER_MODEL = np.array(load_ngram_model(model_path)) if model_path and os.path.exists(model_path) else None
+    _BATCH_OPTIONS.update(timeout=timeout, max_len=max_len)
+
+
+def _raise_timeout(signum, frame):
+    raise ItemTimeout()
+
+
+def _attack(ciphertext, max_len, model):
+    classification = classify_ciphertext(ciphertext, max_len)
+    kind = classification['class']
+    candidates = []
+    if kind == 'caesar':
+        for shift, chi2, _, confidence in rank_caesar_shifts(ciphertext, model)[:3]:
+            candidates.append({'shift': shift, 'confidence': confidence, 'chi2': chi2,
+                               'preview': caesar_decrypt(ciphertext[:80], shift)})
+    elif kind == 'vigenere':
+        for candidate in recover_vigenere_key(ciphertext, max_len, top=3, model=model)[1]:
+            candidates.append({'key': candidate['key'], 'chi2_per_letter': candidate['score'],
+                               'fitness': candidate.get('fitness'),
+                               'preview': vigenere_process(ciphertext[:80], candidate['key'], 'decrypt')[0]})
+    elif kind == 'substitution' and model is not None:
+        result = solve_substitution(ciphertext, restarts=4, workers=0, model=model)
+        candidates.append({'key': result['key'], 'fitness': result['fitness'],
+                           'preview': result['plaintext'][:80]})
+    return dict(classification, candidates=candidates)
+
+
+def _batch_item(item_id, ciphertext):
+    # Тайм-аут через SIGALRM у процесі-воркері (де сигналу немає — без обмеження)
+    timeout = _BATCH_OPTIONS.get('timeout')
+    use_alarm = bool(timeout) and hasattr(signal, 'setitimer')
+    start = time.perf_counter()
+    record = {'id': item_id, 'chars': 0}
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        record['chars'] = len(ciphertext)
+        record.update(_attack(ciphertext, _BATCH_OPTIONS.get('max_len', 20), _WORKER_MODEL))
+        record['status'] = 'ok'
+    except ItemTimeout:
+        record['status'] = 'timeout'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def run_batch(source, output_path, workers=None, timeout=10.0, max_len=20, model_path=NGRAM_MODEL_PATH):
+    """Пакетний криптоаналіз каталогу або JSONL шифротекстів у JSONL-звіт.
+
+    Кожен текст класифікується (classify_ciphertext) і атакується відповідним
+    методом; у звіті — ранжовані кандидати ключів. Тексти обробляються у пулі
+    процесів, у роботі одночасно не більше 2 * workers, порядок рядків звіту
+    збігається з вхідним. timeout — секунд на один текст.
+    """
+    from concurrent.futures import Future, ProcessPoolExecutor
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    summary = {'items': 0, 'chars': 0, 'timeouts': 0, 'errors': 0, 'classes': {}}
+    start = time.perf_counter()
+
+    def write(record):
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        summary['items'] += 1
+        summary['chars'] += record['chars']
+        summary['timeouts'] += record['status'] == 'timeout'
+        summary['errors'] += record['status'] == 'error'
+        kind = record.get('class', record['status'])
+        summary['classes'][kind] = summary['classes'].get(kind, 0) + 1
+
+    with open(output_path, 'w', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                initargs=(model_path, timeout, max_len)) as pool:
+        pending = []
+        for item_id, ciphertext, error in iter_ciphertexts(source):
+            if error is None:
+                future = pool.submit(_batch_item, item_id, ciphertext)
+            else:
+                # Некоректний запис — готовий результат у черзі, щоб не порушити порядок звіту
+                future = Future()
+                future.set_result({'id': item_id, 'chars': 0, 'status': 'error', 'error': error, 'seconds': 0.0})
+            pending.append(future)
+            if len(pending) >= max_pending:
+                write(pending.pop(0).result())
+        for future in pending:
+            write(future.result())
+
+    elapsed = time.perf_counter() - start
+    summary['seconds'] = elapsed
+    summary['items_per_sec'] = summary['items'] / elapsed if elapsed > 0 else 0.0
+    summary['mb_per_s'] = summary['chars'] / elapsed / 1e6 if elapsed > 0 else 0.0
+    return summary
+
+
+# --- 3.4 ПАКЕТНИЙ РЕЖИМ (КОМАНДНИЙ РЯДОК) ---
+
+def analyze_text(ciphertext, cipher_type='vigenere', max_len=20, model=None):
+    """Повний текстовий звіт криптоаналізу, як на вкладці GUI, без графіків."""
+    if cipher_type == 'caesar':
+        return caesar_brute_force(ciphertext, model=model) + "\n\n" + analyze_caesar_frequency(ciphertext, model)[0]
+    reports = [kasiski_test(ciphertext)[0],
+               vigenere_index_of_coincidence_test(ciphertext, max_len)[0],
+               recover_vigenere_key(ciphertext, max_len, model=model)[0]]
+    return "\n\n".join(reports)
+
+
+def cli(argv):
+    parser = argparse.ArgumentParser(description="Шифри Цезаря, Віженера та підстановки (пакетний режим)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in (("encrypt", "Зашифрувати файл у файл"), ("decrypt", "Розшифрувати файл у файл")):
+        p_cipher = sub.add_parser(command, help=help_text)
+        p_cipher.add_argument("input", help="Вхідний текстовий файл")
+        p_cipher.add_argument("output", help="Вихідний файл")
+        p_cipher.add_argument("--cipher", choices=("caesar", "vigenere", "substitution"), default="caesar")
+        p_cipher.add_argument("--shift", type=int, default=None, help="Зсув Цезаря")
+        p_cipher.add_argument("--date", default=None, help="Дата для ключа Цезаря (замість --shift)")
+        p_cipher.add_argument("--key", default=None, help="Ключ Віженера або перестановка для підстановки")
+        p_cipher.add_argument("--surname", default=None, help="Прізвище для ключа Віженера (замість --key)")
+
+    p_analyze = sub.add_parser("analyze", help="Криптоаналіз шифротексту з файлу")
+    p_analyze.add_argument("input", help="Файл із шифротекстом")
+    p_analyze.add_argument("--cipher", choices=("caesar", "vigenere", "substitution"), default="vigenere")
+    p_analyze.add_argument("--max-len", type=int, default=20, help="Найбільша довжина ключа Віженера")
+    p_analyze.add_argument("--model", default=None, help="n-грамна модель .npy (типово ua_quadgrams.npy, якщо є)")
+
+    p_model = sub.add_parser("build-model", help="Побудувати n-грамну модель з корпусу")
+    p_model.add_argument("corpus", nargs="+", help="Текстові файли або каталоги з *.txt")
+    p_model.add_argument("--n", type=int, default=4, help="Довжина n-грам")
+    p_model.add_argument("--output", default=NGRAM_MODEL_PATH, help="Вихідний файл .npy")
+
+    p_profile = sub.add_parser("profile-corpus", help="Профіль частот літер (і n-грам) з корпусу")
+    p_profile.add_argument("corpus", nargs="+", help="Текстові файли або каталоги з *.txt")
+    p_profile.add_argument("--output", default=LETTER_PROFILE_PATH, help="Вихідний профіль JSON")
+    p_profile.add_argument("--ngram", type=int, default=0, help="Також побудувати модель n-грам цієї довжини")
+    p_profile.add_argument("--ngram-output", default=None, help="Файл .npy для n-грамної моделі")
+    p_profile.add_argument("--workers", type=int, default=None, help="Кількість процесів (0 — без пулу)")
+
+    p_batch = sub.add_parser("batch", help="Пакетний криптоаналіз каталогу або JSONL шифротекстів")
+    p_batch.add_argument("input", help="Каталог з *.txt або JSONL з полями id, ciphertext")
+    p_batch.add_argument("output", help="Вихідний JSONL-звіт")
+    p_batch.add_argument("--workers", type=int, default=None, help="Кількість процесів (типово: усі ядра)")
+    p_batch.add_argument("--timeout", type=float, default=10.0, help="Секунд на один шифротекст")
+    p_batch.add_argument("--max-len", type=int, default=20, help="Найбільша довжина ключа Віженера")
+    p_batch.add_argument("--model", default=NGRAM_MODEL_PATH, help="n-грамна модель .npy (якщо є)")
+
+    p_solve = sub.add_parser("bench-substitution", help="Виміряти розв'язувач підстановки на текстах")
+    p_solve.add_argument("texts", nargs="+", help="Файли з відкритими текстами")
+    p_solve.add_argument("--model", default=NGRAM_MODEL_PATH, help="n-грамна модель .npy")
+    p_solve.add_argument("--restarts", type=int, default=8)
+    p_solve.add_argument("--iterations", type=int, default=20000)
+    p_solve.add_argument("--workers", type=int, default=None, help="Кількість процесів (0 — без пулу)")
+
+    p_check = sub.add_parser("check-recovery", help="Перевірити відновлення ключів за χ² на справжніх текстах")
+    p_check.add_argument("texts", nargs="+", help="Файли з українськими текстами")
+    p_check.add_argument("--trials", type=int, default=15, help="Кількість випадкових ключів Віженера")
+    p_check.add_argument("--sample-letters", type=int, default=8000, help="Літер у фрагменті для Віженера")
+    p_check.add_argument("--caesar-letters", type=int, default=1500, help="Літер у фрагменті для Цезаря")
+    p_check.add_argument("--min-vigenere", type=float, default=0.9, help="Мінімальна частка відновлених ключів")
+    p_check.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command in ("encrypt", "decrypt"):
+        shift = args.shift if args.shift is not None else generate_caesar_key(args.date or "")
+        key = args.key
+        if args.cipher == "vigenere" and not key:
+            key = generate_vigenere_key(args.surname or "")
+        if args.cipher == "substitution" and not key:
+            parser.error("для підстановки потрібен --key")
+        stats = process_file(args.input, args.output, args.cipher, args.command, shift, key)
+        print(f"Оброблено {stats['bytes']} байт за {stats['seconds']:.2f} с ({stats['mb_per_s']:.1f} МБ/с) -> {args.output}")
+    elif args.command == "analyze":
+        with open(args.input, 'r', encoding='utf-8') as src:
+            ciphertext = src.read()
+        if args.cipher == "substitution":
+            result = solve_substitution(ciphertext, args.model or NGRAM_MODEL_PATH)
+            print(f"--- ЗАГАЛЬНА ПІДСТАНОВКА ---\nКлюч: {result['key']}\n"
+                  f"Ітерацій/с: {result['iterations_per_sec']:.0f}, час до розв'язку: {result['time_to_solution']:.2f} с\n")
+            print(result['plaintext'])
+        else:
+            model = load_ngram_model(args.model) if args.model else default_ngram_model()
+            print(analyze_text(ciphertext, args.cipher, args.max_len, model))
+    elif args.command == "build-model":
+        start = time.perf_counter()
+        build_ngram_model(args.corpus, args.n, args.output)
+        print(f"Модель {args.n}-грам побудовано за {time.perf_counter() - start:.2f} с -> {args.output}")
+    elif args.command == "profile-corpus":
+        profile, stats = profile_corpus(args.corpus, args.output, args.ngram, args.ngram_output, args.workers)
+        print(f"Файлів: {stats['files']}, літер: {profile['letters']}, {stats['seconds']:.2f} с "
+              f"({stats['mb_per_s']:.1f} МБ/с) -> {args.output}")
+    elif args.command == "batch":
+        summary = run_batch(args.input, args.output, args.workers, args.timeout, args.max_len, args.model)
+        classes = ", ".join(f"{kind}: {count}" for kind, count in sorted(summary['classes'].items()))
+        print(f"Оброблено текстів: {summary['items']} за {summary['seconds']:.2f} с "
+              f"({summary['items_per_sec']:.1f} текстів/с, {summary['mb_per_s']:.2f} млн символів/с)")
+        print(f"Класи: {classes}; тайм-аутів: {summary['timeouts']}, помилок: {summary['errors']}")
+    elif args.command == "bench-substitution":
+        texts = []
+        for path in args.texts:
+            with open(path, 'r', encoding='utf-8') as src:
+                texts.append(src.read())
+        print(benchmark_substitution(texts, args.model, restarts=args.restarts, iterations=args.iterations,
+                                     workers=args.workers))
+    elif args.command == "check-recovery":
+        texts = []
+        for path in args.texts:
+            with open(path, 'r', encoding='utf-8') as src:
+                texts.append(src.read())
+        result = key_recovery_check(texts, args.trials, args.sample_letters, args.caesar_letters, args.seed)
+        print(f"Цезар: відновлено {result['caesar_recovered']} з {result['caesar_trials']} зсувів")
+        for failure in result['caesar_failures']:
+            print(f"   зсув {failure['shift']} -> {failure['recovered']}")
+        print(f"Віженер: відновлено {result['vigenere_recovered']} з {result['vigenere_trials']} ключів")
+        for failure in result['failures']:
+            print(f"   ключ {failure['key']} -> {failure['recovered']}")
+        if (result['caesar_recovered'] < result['caesar_trials']
+                or result['vigenere_recovered'] < args.min_vigenere * result['vigenere_trials']):
+            print("ПОМИЛКА: криптоаналіз за χ² не відновлює ключі")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli(sys.argv[1:])
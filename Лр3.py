@@ -1,36 +1,164 @@
 import os
 import platform
+import struct
 import subprocess
+import zlib
+import numpy as np
 from PIL import Image
 
 
+# === ФОРМАТ ЗАГОЛОВКА ===
+#
+# Версія 1: магія 'STG', версія, прапорці, довжина корисного навантаження
+# в байтах і CRC-32 навантаження (big-endian, 13 байт = 104 біти = 35 пікселів).
+# Зображення без магії читаються за старими 32-бітними маркерами.
+
+STEGO_MAGIC = b'STG'
+STEGO_VERSION = 1
+HEADER_FORMAT = '>3sBBII'
+HEADER_BYTES = struct.calcsize(HEADER_FORMAT)
+HEADER_BITS = HEADER_BYTES * 8
+FLAG_TEXT = 0x01  # навантаження — текст UTF-8
+FLAG_FILE = 0x02  # навантаження — файл: довжина імені ('>H'), ім'я UTF-8, вміст
+
+# Біти обробляються блоками: 24 біти = 8 пікселів = 3 байти, тож межі блоків
+# збігаються і з пікселями, і з байтами; тимчасові масиви — не більші за блок
+CHUNK_BITS = 24 * 65536
+
+LEGACY_START_MARKER = "11111110111111101111111011111110"  # Унікальний маркер початку (32 біта)
+LEGACY_END_MARKER = "10101010101010101010101010101010"  # Унікальний маркер кінця (32 біта)
+
+
+def build_header(payload, flags=0):
+    return struct.pack(HEADER_FORMAT, STEGO_MAGIC, STEGO_VERSION, flags, len(payload), zlib.crc32(payload))
+
+
+def parse_header(data):
+    """Словник полів заголовка або None, якщо магії немає (старий формат)"""
+    magic, version, flags, length, checksum = struct.unpack(HEADER_FORMAT, data)
+    if magic != STEGO_MAGIC:
+        return None
+    if version != STEGO_VERSION:
+        raise ValueError(f"Непідтримувана версія стегозаголовка: {version}")
+    return {'version': version, 'flags': flags, 'length': length, 'checksum': checksum}
+
+
 # === ДОПОМІЖНІ ФУНКЦІЇ ===
 
 def text_to_bits(text):
-    """Конвертація тексту у двійковий формат"""
-    return ''.join(format(ord(c), '08b') for c in text)
+    """Конвертація тексту (UTF-8) у рядок '0'/'1' — лише для показу, не для вбудовування"""
+    return (np.unpackbits(np.frombuffer(text.encode('utf-8'), dtype=np.uint8)) + ord('0')).tobytes().decode('ascii')
 
 
 def bits_to_text(bits):
     """Зворотна конвертація"""
-    chars = [bits[i:i + 8] for i in range(0, len(bits), 8)]
-    result = []
-    for b in chars:
-        if len(b) == 8:
-            char_code = int(b, 2)
-            # Перевірка на валідність символу
-            if 0 < char_code < 1114112:  # Діапазон Unicode
-                try:
-                    result.append(chr(char_code))
-                except ValueError:
-                    pass
-    return ''.join(result)
+    data = np.packbits(bits_to_array(bits[:len(bits) // 8 * 8])).tobytes()
+    return data.decode('utf-8', errors='replace')
+
+
+def bits_to_array(bits):
+    """Рядок '0'/'1' -> масив uint8 з 0/1 (без циклу по символах)"""
+    return np.frombuffer(bits.encode('ascii'), dtype=np.uint8) - ord('0')
+
+
+def message_to_bit_array(message):
+    """Біти повідомлення старого формату (з маркерами) масивом: байт latin-1 на символ.
+
+    Символи понад U+00FF (зокрема кирилиця) старий формат не зберігає —
+    раніше вони мовчки псувалися, тепер це помилка.
+    """
+    try:
+        data = message.encode('latin-1')
+    except UnicodeEncodeError:
+        raise ValueError("Старий формат підтримує лише символи до U+00FF — використайте формат із заголовком")
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def bit_array_to_text(bits):
+    """Групи по 8 біт -> текст latin-1, нульові байти пропускаються (старий формат)"""
+    return np.packbits(bits[:len(bits) // 8 * 8]).tobytes().replace(b'\0', b'').decode('latin-1')
+
+
+def _write_lsb(flat, start, bits):
+    """Записує біти у flat[start:], повертає кількість змінених пікселів (start кратний 3)"""
+    region = flat[start:start + len(bits)]
+    changed = (region & 1) != bits
+    region &= 0xFE
+    region |= bits
+    padded = np.zeros(-(-len(bits) // 3) * 3, dtype=bool)
+    padded[:len(bits)] = changed
+    return int(padded.reshape(-1, 3).any(axis=1).sum())
+
+
+def embed_bits(img, bits):
+    """Записує біти в молодші біти каналів R, G, B (по рядках) одним присвоєнням.
+
+    Повертає кількість змінених пікселів.
+    """
+    pixels = np.array(img, dtype=np.uint8)
+    changed = _write_lsb(pixels.reshape(-1), 0, bits)
+    # Дані повертаються в той самий об'єкт Image, тож info (ICC тощо) зберігається
+    img.frombytes(pixels.tobytes())
+    return changed
+
+
+def embed_bytes(img, data):
+    """Як embed_bits, але для байтів: розпаковка в біти блоками по CHUNK_BITS,
+    без масиву на 8 елементів на кожен байт даних.
+    """
+    pixels = np.array(img, dtype=np.uint8)
+    flat = pixels.reshape(-1)
+    view = np.frombuffer(data, dtype=np.uint8)
+    changed = 0
+    for start in range(0, len(view) * 8, CHUNK_BITS):
+        changed += _write_lsb(flat, start, np.unpackbits(view[start // 8:(start + CHUNK_BITS) // 8]))
+    img.frombytes(pixels.tobytes())
+    return changed
+
+
+def read_lsb(img):
+    """Молодші біти всіх каналів R, G, B (по рядках) як масив uint8"""
+    return np.asarray(img, dtype=np.uint8).reshape(-1) & 1
+
+
+def _lsb_rows(img, start_bit, count):
+    """Канали рядків пікселів, що містять біти [start_bit, start_bit + count), і зсув start_bit у них.
+
+    Копіюються лише ці рядки (crop), а не все зображення.
+    """
+    width, height = img.size
+    last_pixel = -(-(start_bit + count) // 3)
+    top = start_bit // 3 // width
+    bottom = min(height, -(-last_pixel // width))
+    rows = np.asarray(img.crop((0, top, width, bottom)), dtype=np.uint8).reshape(-1)
+    return rows, start_bit - top * width * 3
+
+
+def read_lsb_range(img, start_bit, count):
+    """count молодших бітів, починаючи з біта start_bit"""
+    rows, offset = _lsb_rows(img, start_bit, count)
+    return rows[offset:offset + count] & 1
+
+
+def read_bytes(img, start_bit, count):
+    """count байтів з молодших бітів, починаючи з біта start_bit (пакування блоками)"""
+    rows, offset = _lsb_rows(img, start_bit, count * 8)
+    end = offset + count * 8
+    out = bytearray()
+    for start in range(offset, end, CHUNK_BITS):
+        out += np.packbits(rows[start:min(start + CHUNK_BITS, end)] & 1).tobytes()
+    return bytes(out)
 
 
 # === ОСНОВНА ЛОГІКА ===
 
-def hide_message(input_path, output_path, message):
-    """Приховує повідомлення у PNG-зображенні"""
+def hide_message(input_path, output_path, message, legacy=False, flags=0):
+    """Приховує повідомлення у PNG-зображенні
+
+    message — текст (зберігається як UTF-8 з FLAG_TEXT) або bytes (як є, з flags).
+    Типово — заголовок формату STEGO_VERSION; legacy=True — старий формат
+    з маркерами початку й кінця (лише для тексту).
+    """
     print("\n" + "=" * 70)
     print("  ПРОЦЕС ПРИХОВУВАННЯ")
     print("=" * 70)
@@ -39,57 +167,42 @@ def hide_message(input_path, output_path, message):
     print("\n[1/5] Завантаження зображення...")
     img = Image.open(input_path)
     img = img.convert('RGB')
-    pixels = img.load()
     width, height = img.size
     print(f"      Розмір: {width}x{height} пікселів")
-    print(f"      Максимальна ємність: {(width * height * 3) // 8} символів")
+    print(f"      Максимальна ємність: {(width * height * 3) // 8} байт")
 
     # Крок 2: Конвертація у біти
     print("\n[2/5] Конвертація у біти...")
-    start_marker = "11111110111111101111111011111110"  # Унікальний маркер початку (32 біта)
-    end_marker = "10101010101010101010101010101010"  # Унікальний маркер кінця (32 біта)
-    message_bits = start_marker + text_to_bits(message) + end_marker
-
-    print(f"      Довжина повідомлення: {len(message)} символів")
-    print(f"      У бітах (з маркерами): {len(message_bits)} біт")
-    print(f"      Перші 32 біти: {message_bits[:32]}...")
+    if legacy:
+        message_bits = np.concatenate((bits_to_array(LEGACY_START_MARKER), message_to_bit_array(message),
+                                       bits_to_array(LEGACY_END_MARKER)))
+        total_bits = len(message_bits)
+        first_bits = message_bits[:32]
+    else:
+        if isinstance(message, str):
+            payload, flags = message.encode('utf-8'), flags | FLAG_TEXT
+        else:
+            payload = bytes(message)
+        # Біти не розпаковуються наперед: embed_bytes робить це блоками
+        data = build_header(payload, flags) + payload
+        total_bits = len(data) * 8
+        first_bits = np.unpackbits(np.frombuffer(data[:4], dtype=np.uint8))
+
+    if isinstance(message, str):
+        print(f"      Довжина повідомлення: {len(message)} символів")
+    else:
+        print(f"      Довжина даних: {len(message):,} байт")
+    print(f"      У бітах ({'з маркерами' if legacy else 'із заголовком'}): {total_bits} біт")
+    print(f"      Перші 32 біти: {''.join(map(str, first_bits.tolist()))}...")
 
     # Перевірка ємності
     max_bits = width * height * 3
-    if len(message_bits) > max_bits:
-        raise ValueError(f"Повідомлення занадто довге! Макс: {max_bits // 8} символів")
+    if total_bits > max_bits:
+        raise ValueError(f"Повідомлення занадто довге! Макс: {max_bits // 8} байт")
 
     # Крок 3: Вбудовування
     print("\n[3/5] Вбудовування бітів у пікселі...")
-    data_index = 0
-    modified_pixels = 0
-
-    for y in range(height):
-        for x in range(width):
-            if data_index >= len(message_bits):
-                break
-
-            r, g, b = pixels[x, y]
-            original = (r, g, b)
-
-            # Замінюємо молодші біти
-            if data_index < len(message_bits):
-                r = (r & ~1) | int(message_bits[data_index])
-                data_index += 1
-            if data_index < len(message_bits):
-                g = (g & ~1) | int(message_bits[data_index])
-                data_index += 1
-            if data_index < len(message_bits):
-                b = (b & ~1) | int(message_bits[data_index])
-                data_index += 1
-
-            pixels[x, y] = (r, g, b)
-
-            if (r, g, b) != original:
-                modified_pixels += 1
-
-        if data_index >= len(message_bits):
-            break
+    modified_pixels = embed_bits(img, message_bits) if legacy else embed_bytes(img, data)
 
     print(f"      Модифіковано пікселів: {modified_pixels}")
     print(f"      Відсоток зміни: {(modified_pixels / (width * height) * 100):.2f}%")
@@ -127,8 +240,20 @@ def hide_message(input_path, output_path, message):
     print("=" * 70)
 
 
+def hide_file(input_path, output_path, file_path):
+    """Приховує довільний файл (ім'я + вміст, FLAG_FILE)"""
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    name = os.path.basename(file_path).encode('utf-8')
+    hide_message(input_path, output_path, struct.pack('>H', len(name)) + name + content, flags=FLAG_FILE)
+
+
 def extract_message(image_path):
-    """Витягує повідомлення з PNG-зображення"""
+    """Витягує повідомлення з PNG-зображення
+
+    Повертає str для тексту, (ім'я, bytes) для файлу (FLAG_FILE), bytes для
+    інших двійкових даних або None, якщо повідомлення немає чи воно пошкоджене.
+    """
     print("\n" + "=" * 70)
     print("  ПРОЦЕС ВИТЯГУВАННЯ")
     print("=" * 70)
@@ -136,37 +261,57 @@ def extract_message(image_path):
     print("\n[1/4] Завантаження стегозображення...")
     img = Image.open(image_path)
     img = img.convert('RGB')
-    pixels = img.load()
     width, height = img.size
     print(f"      Розмір: {width}x{height} пікселів")
 
-    print("\n[2/4] Читання молодших бітів...")
-    bits = ""
-    for y in range(height):
-        for x in range(width):
-            r, g, b = pixels[x, y]
-            bits += str(r & 1)
-            bits += str(g & 1)
-            bits += str(b & 1)
-
-    print(f"      Зібрано {len(bits)} біт")
+    print("\n[2/4] Читання заголовка...")
+    capacity = width * height * 3
+    header = None
+    if capacity >= HEADER_BITS:
+        header = parse_header(np.packbits(read_lsb_range(img, 0, HEADER_BITS)).tobytes())
+
+    if header is not None:
+        print(f"      [+] Формат v{header['version']}, навантаження {header['length']} байт")
+        if HEADER_BITS + header['length'] * 8 > capacity:
+            print("      [!] Довжина в заголовку перевищує ємність зображення!")
+            return None
+
+        print("\n[3/4] Читання лише бітів навантаження...")
+        payload = read_bytes(img, HEADER_BITS, header['length'])
+        print(f"      Прочитано {header['length'] * 8} біт з {capacity}")
+        if zlib.crc32(payload) != header['checksum']:
+            print("      [!] Контрольна сума не збігається — дані пошкоджено!")
+            return None
+        if header['flags'] & FLAG_TEXT:
+            message = payload.decode('utf-8', errors='replace')
+        elif header['flags'] & FLAG_FILE:
+            name_len, = struct.unpack('>H', payload[:2])
+            message = (payload[2:2 + name_len].decode('utf-8', errors='replace'), payload[2 + name_len:])
+        else:
+            message = payload
+    else:
+        print("      Заголовка немає — старий формат з маркерами")
+        bit_array = read_lsb(img)
+        # Рядок '0'/'1' як bytes: пошук маркерів — у C (bytes.find), без конкатенації
+        bits = (bit_array + ord('0')).tobytes()
 
-    print("\n[3/4] Пошук маркерів повідомлення...")
-    start_marker = "11111110111111101111111011111110"  # Унікальний маркер початку (32 біта)
-    end_marker = "10101010101010101010101010101010"  # Унікальний маркер кінця (32 біта)
+        print(f"      Зібрано {len(bits)} біт")
 
-    start = bits.find(start_marker)
-    end = bits.find(end_marker, start + len(start_marker) if start != -1 else 0)
+        print("\n[3/4] Пошук маркерів повідомлення...")
+        start = bits.find(LEGACY_START_MARKER.encode('ascii'))
+        end = bits.find(LEGACY_END_MARKER.encode('ascii'), start + len(LEGACY_START_MARKER) if start != -1 else 0)
+        # Маркер кінця може збігтися зі зсувом на кілька бітів (байт на '10'): беремо лише вирівняний
+        while start != -1 and end != -1 and (end - start) % 8:
+            end = bits.find(LEGACY_END_MARKER.encode('ascii'), end + 1)
 
-    if start == -1 or end == -1:
-        print("      [!] Маркери не знайдено!")
-        return None
+        if start == -1 or end == -1:
+            print("      [!] Маркери не знайдено!")
+            return None
 
-    print(f"      [+] Початок: позиція {start}")
-    print(f"      [+] Кінець: позиція {end}")
+        print(f"      [+] Початок: позиція {start}")
+        print(f"      [+] Кінець: позиція {end}")
 
-    message_bits = bits[start + len(start_marker):end]
-    message = bits_to_text(message_bits)
+        message = bit_array_to_text(bit_array[start + len(LEGACY_START_MARKER):end])
 
     print("\n[4/4] Декодування повідомлення...")
 
@@ -187,24 +332,14 @@ def compare_images(original_path, stego_path):
         orig_img = Image.open(original_path).convert('RGB')
         stego_img = Image.open(stego_path).convert('RGB')
 
-        orig_pixels = orig_img.load()
-        stego_pixels = stego_img.load()
-
         width, height = orig_img.size
 
         total_pixels = width * height
-        changed_pixels = 0
-        total_diff = 0
 
         print("\nАналіз пікселів...")
-        for y in range(height):
-            for x in range(width):
-                r1, g1, b1 = orig_pixels[x, y]
-                r2, g2, b2 = stego_pixels[x, y]
-
-                if (r1, g1, b1) != (r2, g2, b2):
-                    changed_pixels += 1
-                    total_diff += abs(r1 - r2) + abs(g1 - g2) + abs(b1 - b2)
+        diff = np.abs(np.asarray(orig_img, dtype=np.int16) - np.asarray(stego_img, dtype=np.int16))
+        changed_pixels = int(diff.any(axis=2).sum())
+        total_diff = int(diff.sum())
 
         print(f"\nСтатистика змін:")
         print(f"   Загальна кількість пікселів: {total_pixels:,}")
@@ -242,10 +377,11 @@ def main():
         print("  1. Приховати повідомлення")
         print("  2. Витягнути повідомлення")
         print("  3. Порівняти зображення")
-        print("  4. Вихід")
+        print("  4. Приховати файл")
+        print("  5. Вихід")
         print("=" * 70)
 
-        choice = input("\nВаш вибір (1-4): ").strip()
+        choice = input("\nВаш вибір (1-5): ").strip()
 
         if choice == "1":
             print("\n" + "-" * 70)
@@ -275,7 +411,13 @@ def main():
             try:
                 extracted = extract_message(image_path)
 
-                if extracted:
+                if isinstance(extracted, (tuple, bytes)):
+                    name, content = extracted if isinstance(extracted, tuple) else ("payload.bin", extracted)
+                    out_path = "extracted_" + os.path.basename(name)
+                    with open(out_path, 'wb') as f:
+                        f.write(content)
+                    print(f"\nВИТЯГНУТО ФАЙЛ: {out_path} ({len(content):,} байт)")
+                elif extracted:
                     print(f"\nВИТЯГНУТЕ ПОВІДОМЛЕННЯ:")
                     print("─" * 70)
                     print(f"   {extracted}")
@@ -300,6 +442,20 @@ def main():
                 print("[!] Один із файлів не знайдено!")
 
         elif choice == "4":
+            print("\n" + "-" * 70)
+            image_path = input("Шлях до PNG-зображення: ").strip()
+            file_path = input("Файл для приховування: ").strip()
+
+            if not (os.path.exists(image_path) and os.path.exists(file_path)):
+                print("[!] Файл не знайдено!")
+                continue
+
+            try:
+                hide_file(image_path, "stego_" + os.path.basename(image_path), file_path)
+            except Exception as e:
+                print(f"\n[!] Помилка: {e}")
+
+        elif choice == "5":
             print("\n" + "=" * 70)
             print("Все")
             print("=" * 70 + "\n")